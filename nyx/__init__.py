@@ -1 +1,31 @@
-from .nyx import Nyx
+# names are resolved on first access (PEP 562), so "import nyx" stays cheap and
+# e.g. nyx.PortSet doesn't load the parser module or the other way round
+_EXPORTS = {
+    "ArgumentError": "nyx",
+    "CompiledParser": "nyx",
+    "HelpRequested": "nyx",
+    "Nyx": "nyx",
+    "NyxError": "nyx",
+    "ParseResult": "nyx",
+    "FindingsStore": "findings",
+    "LineFile": "lines",
+    "PortSet": "ports",
+    "IPRangeSet": "ranges",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
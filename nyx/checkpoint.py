@@ -0,0 +1,134 @@
+"""Append-only checkpoint log of the targets a Nyx.run() already finished"""
+
+import os
+import time
+from hashlib import blake2b
+
+# integer keys below this are positions kept in a bitmap (512 MiB at most), others are hashed
+_BITMAP_KEYS = 1 << 32
+
+
+class Checkpoint:
+    """
+    Keys of finished targets, one per line in an append-only file.
+
+    Integer keys (input positions, e.g. line numbers of a wordlist or address offsets of a
+    CIDR input) are written as they are and loaded into a bitmap, one bit per position, so
+    resuming a 100M-line input takes 12.5 MB. Other keys are written as "h" and a 64-bit hash
+    of their repr() and loaded into a set. Either way a resume check is one O(1) lookup.
+    Lines are written in batches and fsync'ed every `sync_every` keys or `sync_interval`
+    seconds, so a killed run loses at most one batch (those targets simply run again).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        resume: bool = False,
+        sync_every: int = 1000,
+        sync_interval: float = 1.0,
+    ) -> None:
+        """
+        Parameters:
+        path (str): Checkpoint file.
+        resume (bool): Load the keys already in the file and keep appending to it. If False
+                       the file starts empty. Default is False.
+        sync_every (int): Keys per batch written and fsync'ed. Default is 1000.
+        sync_interval (float): Seconds after which a batch is written anyway. Default is 1.0.
+        """
+        self.path = path
+        self.sync_every = max(sync_every, 1)
+        self.sync_interval = sync_interval
+        self.__positions = bytearray()
+        self.__hashed = set()
+        self.__pending = []
+        if resume and os.path.exists(path):
+            self.__load(path)
+        self.resumed = (
+            int.from_bytes(self.__positions, "little").bit_count() + len(self.__hashed)
+        )
+        self.__file = open(path, "a" if resume else "w")
+        self.__last_sync = time.monotonic()
+
+    def done(self, key) -> bool:
+        """Whether key was finished before."""
+        if _is_position(key):
+            byte = key >> 3
+            return byte < len(self.__positions) and bool(self.__positions[byte] >> (key & 7) & 1)
+        return _digest(key) in self.__hashed
+
+    def add(self, key) -> None:
+        """Marks key as finished."""
+        if _is_position(key):
+            self.__set(key)
+            self.__pending.append(f"{key}\n")
+        else:
+            digest = _digest(key)
+            self.__hashed.add(digest)
+            self.__pending.append(f"h{digest}\n")
+        if (
+            len(self.__pending) >= self.sync_every
+            or time.monotonic() - self.__last_sync >= self.sync_interval
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        """Writes the pending keys and fsyncs the file."""
+        self.__last_sync = time.monotonic()
+        if not self.__pending:
+            return
+        self.__file.write("".join(self.__pending))
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__pending = []
+
+    def close(self) -> None:
+        if not self.__file.closed:
+            self.sync()
+            self.__file.close()
+
+    def __load(self, path: str) -> None:
+        positions = self.__positions
+        hashed = self.__hashed
+        with open(path, "rb") as f:
+            for line in f:
+                if line[-1] != 10:
+                    # half-written last line of a killed run, cut so appends start clean
+                    os.truncate(path, f.tell() - len(line))
+                    break
+                try:
+                    if line[0] == 104:  # "h"
+                        hashed.add(int(line[1:]))
+                        continue
+                    position = int(line)
+                except ValueError:
+                    continue
+                if not 0 <= position < _BITMAP_KEYS:
+                    continue
+                # __set() inlined, this loop runs once per finished target
+                byte = position >> 3
+                if byte >= len(positions):
+                    positions.extend(bytes(max(byte + 1 - len(positions), len(positions))))
+                positions[byte] |= 1 << (position & 7)
+
+    def __set(self, position: int) -> None:
+        positions = self.__positions
+        byte = position >> 3
+        if byte >= len(positions):
+            # doubling keeps growing a bitmap for a sequential input amortized O(1)
+            positions.extend(bytes(max(byte + 1 - len(positions), len(positions))))
+        positions[byte] |= 1 << (position & 7)
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _is_position(key) -> bool:
+    return type(key) is int and 0 <= key < _BITMAP_KEYS
+
+
+def _digest(key) -> int:
+    # repr() keeps 5 and "5" apart
+    return int.from_bytes(blake2b(repr(key).encode(), digest_size=8).digest(), "little")
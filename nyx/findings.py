@@ -0,0 +1,359 @@
+"""Columnar, deduplicated store for the findings recorded with Nyx.record()"""
+
+import csv
+import heapq
+import json
+import mmap
+import sys
+import tempfile
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from hashlib import blake2b
+from math import ceil, log
+
+# estimated bytes per stored value besides the value itself (dict entry, list slot)
+_VALUE_OVERHEAD = 100
+# estimated bytes per 128-bit digest in the exact dedupe set (int object and set slot)
+_DIGEST_BYTES = 80
+# on-disk digest runs kept before they are merged into one
+_MAX_RUNS = 8
+
+
+class FindingsStore:
+    """
+    Memory-bounded table of findings (dicts of field -> value).
+
+    Every field is a column of 4-byte codes into a table of the distinct values seen in that
+    column, so repeated strings (service names, statuses, ports) are stored once. When the
+    estimated size of the table passes memory_limit, the rows are appended to a temporary
+    JSONL file and the in-memory columns start empty again, so memory stays flat whatever
+    the number of findings. Export streams the spilled rows and then the in-memory ones.
+
+    Duplicates are detected by hashing a typed encoding of the key fields (all fields by
+    default), so -1 and -2 or True and 1 stay different findings. "exact" keeps a 128-bit
+    digest per unique finding: recent ones in a set counted against memory_limit, older ones
+    in sorted files written when the rows spill, searched by bisection (so new findings get
+    a little slower once the store spilled, memory stays flat). "approx" is a fixed-size
+    Bloom filter sized for `capacity` keys at `error_rate` false positives (~1.8 bytes per
+    key at 0.1%) that never touches the disk. Values should be str, int, float, bool or None,
+    anything else is stored as str().
+    """
+
+    def __init__(
+        self,
+        key: Iterable[str] | None = None,
+        dedupe: str | None = "exact",
+        memory_limit: int = 256 * 1024 * 1024,
+        spill_dir: str | None = None,
+        capacity: int = 100_000_000,
+        error_rate: float = 0.001,
+    ) -> None:
+        """
+        Parameters:
+        key (Iterable[str] | None): Fields that identify a finding. Default is None (all fields).
+        dedupe (str | None): "exact", "approx" or None to keep duplicates. Default is "exact".
+        memory_limit (int): Estimated bytes of rows and "exact" digests kept in memory before
+                            spilling to disk. Default is 256 MiB.
+        spill_dir (str | None): Directory of the spill file. Default is the system temp dir.
+        capacity (int): Expected number of unique findings, sizes the "approx" filter.
+                        Default is 100 million.
+        error_rate (float): Chance that a new finding is taken for a duplicate in "approx"
+                            mode. Default is 0.001.
+        """
+        if dedupe not in (None, "exact", "approx"):
+            raise ValueError(f"Invalid dedupe '{dedupe}', expected 'exact', 'approx' or None")
+        self.key = tuple(key) if key is not None else None
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.duplicates = 0
+
+        # record() is called from run() workers
+        self.__lock = threading.Lock()
+        # every field ever seen, in order, for the CSV header
+        self.__fields = {}
+        self.__columns = {}
+        self.__rows = 0
+        self.__size = 0
+        self.__spill = None
+        self.__spilled = 0
+        if dedupe == "exact":
+            self.__seen = _DigestSet(spill_dir)
+        elif dedupe == "approx":
+            self.__seen = _BloomFilter(capacity, error_rate)
+        else:
+            self.__seen = None
+        self.__exact = dedupe == "exact"
+
+    def add(self, fields: dict) -> bool:
+        """
+        Stores one finding.
+
+        Returns:
+        bool: False if it's a duplicate of an earlier one (and wasn't stored), True otherwise.
+        """
+        fields = {
+            name: value if value is None or isinstance(value, (str, int, float)) else str(value)
+            for name, value in fields.items()
+        }
+        if self.key is not None:
+            key = [fields.get(name) for name in self.key]
+        else:
+            key = fields
+        # JSON keeps the types apart (1, 1.0, true, "1"), sort_keys makes field order irrelevant
+        encoded = json.dumps(key, sort_keys=True, ensure_ascii=False)
+        digest = int.from_bytes(blake2b(encoded.encode(), digest_size=16).digest(), "little")
+
+        with self.__lock:
+            seen = self.__seen
+            if seen is not None:
+                if digest in seen:
+                    self.duplicates += 1
+                    return False
+                seen.add(digest)
+                if self.__exact:
+                    self.__size += _DIGEST_BYTES
+
+            for name in fields:
+                if name not in self.__fields:
+                    self.__fields[name] = None
+                if name not in self.__columns:
+                    # rows stored before this field appeared get None
+                    self.__columns[name] = _Column(self.__rows)
+                    self.__size += 4 * self.__rows
+            for name, column in self.__columns.items():
+                self.__size += column.append(fields.get(name))
+            self.__rows += 1
+
+            if self.__size >= self.memory_limit:
+                self.__spill_rows()
+                if self.__exact:
+                    seen.spill()
+            return True
+
+    def __len__(self) -> int:
+        return self.__spilled + self.__rows
+
+    def __iter__(self) -> Iterator[dict]:
+        """Yields every finding as a dict, in recording order. Don't add() while iterating."""
+        with self.__lock:
+            yield from self.__iter_rows()
+
+    @property
+    def fields(self) -> list[str]:
+        """Every field name seen so far, in the order they first appeared."""
+        return list(self.__fields)
+
+    def export(self, path: str, fmt: str | None = None) -> int:
+        """
+        Writes every finding to a CSV or JSONL file in one streaming pass.
+
+        Parameters:
+        path (str): Output file, "-" for stdout.
+        fmt (str | None): "csv" or "jsonl". Default is None (csv if path ends with .csv, else jsonl).
+
+        Returns:
+        int: Number of findings written.
+        """
+        if fmt is None:
+            fmt = "csv" if path.endswith(".csv") else "jsonl"
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Invalid format '{fmt}', expected 'csv' or 'jsonl'")
+
+        with self.__lock:
+            stream = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+            try:
+                count = 0
+                if fmt == "csv":
+                    writer = csv.DictWriter(stream, fieldnames=list(self.__fields), restval="")
+                    writer.writeheader()
+                    for row in self.__iter_rows():
+                        writer.writerow(row)
+                        count += 1
+                else:
+                    for row in self.__iter_rows():
+                        stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+                        count += 1
+            finally:
+                if stream is sys.stdout:
+                    stream.flush()
+                else:
+                    stream.close()
+        return count
+
+    def close(self) -> None:
+        """Deletes the spill file."""
+        with self.__lock:
+            if self.__spill is not None:
+                self.__spill.close()
+                self.__spill = None
+            if self.__exact:
+                self.__seen.close()
+
+    def __iter_rows(self) -> Iterator[dict]:
+        if self.__spill is not None:
+            self.__spill.flush()
+            self.__spill.seek(0)
+            for line in self.__spill:
+                yield json.loads(line)
+            # appends go to the end, reading moved the position there anyway
+            self.__spill.seek(0, 2)
+        yield from self.__iter_rows_in_memory()
+
+    def __spill_rows(self) -> None:
+        if self.__spill is None:
+            self.__spill = tempfile.TemporaryFile(
+                "w+", encoding="utf-8", dir=self.spill_dir, prefix="nyx-findings-"
+            )
+        write = self.__spill.write
+        for row in self.__iter_rows_in_memory():
+            write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.__spilled += self.__rows
+        self.__columns = {}
+        self.__rows = 0
+        self.__size = 0
+
+    def __iter_rows_in_memory(self) -> Iterator[dict]:
+        columns = list(self.__columns.items())
+        for index in range(self.__rows):
+            row = {}
+            for name, column in columns:
+                value = column.get(index)
+                if value is not None:
+                    row[name] = value
+            yield row
+
+
+class _Column:
+    """Dictionary-encoded column: one code per row, every distinct value stored once."""
+
+    __slots__ = ("codes", "values", "index")
+
+    def __init__(self, rows: int) -> None:
+        # code 0 is None (field missing in that row)
+        self.codes = array("I", bytes(4 * rows))
+        self.values = [None]
+        self.index = {}
+
+    def append(self, value) -> int:
+        """Adds the value of the next row, returns the estimated bytes it added."""
+        if value is None:
+            self.codes.append(0)
+            return 4
+        # keyed by type too, so 1, 1.0 and True stay apart
+        key = (type(value), value)
+        code = self.index.get(key)
+        if code is not None:
+            self.codes.append(code)
+            return 4
+        code = self.index[key] = len(self.values)
+        self.values.append(value)
+        self.codes.append(code)
+        return 4 + sys.getsizeof(value) + _VALUE_OVERHEAD
+
+    def get(self, row: int):
+        return self.values[self.codes[row]]
+
+
+class _DigestSet:
+    """
+    Exact set of 128-bit digests that moves its contents to disk on spill().
+
+    Each spill writes the in-memory digests as one sorted file of 16-byte big-endian records
+    (byte order = numeric order), looked up by bisection through mmap. More than _MAX_RUNS
+    files are merged into one in a streaming pass, so a miss costs at most a few bisections.
+    """
+
+    def __init__(self, spill_dir: str | None) -> None:
+        self.__spill_dir = spill_dir
+        self.__recent = set()
+        # (file, mmap, number of records)
+        self.__runs = []
+
+    def __contains__(self, digest: int) -> bool:
+        if digest in self.__recent:
+            return True
+        if not self.__runs:
+            return False
+        record = digest.to_bytes(16, "big")
+        return any(_bisect_run(data, count, record) for _, data, count in self.__runs)
+
+    def add(self, digest: int) -> None:
+        self.__recent.add(digest)
+
+    def spill(self) -> None:
+        if not self.__recent:
+            return
+        records = (digest.to_bytes(16, "big") for digest in sorted(self.__recent))
+        self.__runs.append(self.__write_run(records))
+        self.__recent = set()
+        if len(self.__runs) > _MAX_RUNS:
+            runs = self.__runs
+            merged = heapq.merge(*(_iter_run(data, count) for _, data, count in runs))
+            self.__runs = [self.__write_run(merged)]
+            for f, data, _ in runs:
+                data.close()
+                f.close()
+
+    def close(self) -> None:
+        for f, data, _ in self.__runs:
+            data.close()
+            f.close()
+        self.__runs = []
+        self.__recent = set()
+
+    def __write_run(self, records: Iterator[bytes]) -> tuple:
+        f = tempfile.TemporaryFile("w+b", dir=self.__spill_dir, prefix="nyx-digests-")
+        count = 0
+        for record in records:
+            f.write(record)
+            count += 1
+        f.flush()
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), count
+
+
+def _iter_run(data: mmap.mmap, count: int) -> Iterator[bytes]:
+    for offset in range(0, count * 16, 16):
+        yield data[offset : offset + 16]
+
+
+def _bisect_run(data: mmap.mmap, count: int, record: bytes) -> bool:
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        found = data[middle * 16 : middle * 16 + 16]
+        if found < record:
+            low = middle + 1
+        elif found > record:
+            high = middle
+        else:
+            return True
+    return False
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter of 128-bit digests (double hashing for the k bit positions)."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.__bits = max(ceil(-capacity * log(error_rate) / log(2) ** 2), 64)
+        self.__hashes = max(round(self.__bits / capacity * log(2)), 1)
+        self.__array = bytearray((self.__bits + 7) // 8)
+
+    def __positions(self, digest: int) -> Iterator[int]:
+        first = digest & 0xFFFFFFFFFFFFFFFF
+        # second hash from the upper 64 bits, odd so it cycles through every bit
+        second = (digest >> 64 & 0xFFFFFFFFFFFFFFFF) | 1
+        bits = self.__bits
+        for i in range(self.__hashes):
+            yield (first + i * second) % bits
+
+    def __contains__(self, digest: int) -> bool:
+        data = self.__array
+        return all(data[p >> 3] >> (p & 7) & 1 for p in self.__positions(digest))
+
+    def add(self, digest: int) -> None:
+        data = self.__array
+        for p in self.__positions(digest):
+            data[p >> 3] |= 1 << (p & 7)
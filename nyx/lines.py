@@ -0,0 +1,169 @@
+"""Memory-mapped, lazily indexed line files used by the "lines" argument type"""
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+
+# the newline index never has more entries than this, whatever the file size
+_MAX_BLOCKS = 65536
+_MIN_BLOCK = 64 * 1024
+
+
+class LineFile:
+    """
+    Read-only sequence of the lines of a (possibly huge) text file.
+
+    The file is memory-mapped, so iterating it never loads more than the current line.
+    len() and random access use an index with the number of newlines before every block
+    of the file (at most 65536 entries), built on first use with one pass over the file.
+    Lines are decoded as UTF-8 with surrogateescape, so odd bytes in wordlists survive,
+    and a trailing "\\r" is stripped.
+
+    With convert set (e.g. arg_type="lines:ip"), lines are passed through it while
+    iterating, lines it rejects are skipped and counted in `skipped`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        start: int = 0,
+        end: int | None = None,
+        convert: Callable | None = None,
+    ) -> None:
+        """
+        Parameters:
+        path (str): Path of the text file.
+        start (int): Byte offset of the first line. Must be the start of a line. Default is 0.
+        end (int | None): Byte offset where the view stops. Default is None (end of file).
+        convert (Callable | None): Validator/converter applied to every line while iterating.
+                                   It should raise ValueError for invalid lines. Default is None.
+        """
+        self.path = path
+        self.convert = convert
+        self.skipped = 0
+
+        size = os.path.getsize(path)
+        if size:
+            with open(path, "rb") as f:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty files can't be mapped
+            self.__map = b""
+
+        self.start = min(max(start, 0), size)
+        self.end = size if end is None else min(max(end, self.start), size)
+        self.__counts = None
+        self.__block = max(_MIN_BLOCK, -(-(self.end - self.start) // _MAX_BLOCKS))
+        self.__length = None
+
+    def __iter__(self) -> Iterator:
+        find = self.__map.find
+        mm = self.__map
+        convert = self.convert
+        pos = self.start
+        end = self.end
+
+        while pos < end:
+            newline = find(b"\n", pos, end)
+            if newline == -1:
+                newline = end
+            line = _decode(mm[pos:newline])
+            pos = newline + 1
+            if convert is None:
+                yield line
+                continue
+            try:
+                yield convert(line)
+            except (ValueError, TypeError, LookupError):
+                self.skipped += 1
+
+    def __len__(self) -> int:
+        """Number of lines in the view, including ones convert would skip."""
+        if self.__length is None:
+            self.__build_index()
+        return self.__length
+
+    def __getitem__(self, index: int) -> str:
+        """Returns the raw line at index (convert is not applied)."""
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("line index out of range")
+
+        pos = self.start
+        if index:
+            # block that holds the index-th newline, then walk to it
+            block = bisect_left(self.__counts, index) - 1
+            pos += block * self.__block
+            for _ in range(index - self.__counts[block]):
+                pos = self.__map.find(b"\n", pos, self.end) + 1
+
+        newline = self.__map.find(b"\n", pos, self.end)
+        return _decode(self.__map[pos : newline if newline != -1 else self.end])
+
+    def shards(self, count: int) -> list["LineFile"]:
+        """
+        Splits the view into `count` byte ranges of about equal size, cut on line boundaries.
+        Every shard maps the file on its own and can be handed to a separate worker.
+
+        Parameters:
+        count (int): Number of shards.
+
+        Returns:
+        list[LineFile]: Non-overlapping views that together cover every line.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        span = self.end - self.start
+        bounds = [self.start]
+        for i in range(1, count):
+            cut = self.start + span * i // count
+            if cut > bounds[-1]:
+                # move the cut to the start of the next line
+                newline = self.__map.find(b"\n", cut - 1, self.end)
+                cut = self.end if newline == -1 else newline + 1
+            bounds.append(max(cut, bounds[-1]))
+        bounds.append(self.end)
+        return [
+            LineFile(self.path, bounds[i], bounds[i + 1], self.convert)
+            for i in range(count)
+        ]
+
+    def close(self) -> None:
+        if isinstance(self.__map, mmap.mmap):
+            self.__map.close()
+
+    def __enter__(self) -> "LineFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __reduce__(self):
+        # mmaps can't be pickled, workers in other processes map the file again
+        return LineFile, (self.path, self.start, self.end, self.convert)
+
+    def __repr__(self) -> str:
+        return f"LineFile({self.path!r}, start={self.start}, end={self.end})"
+
+    def __build_index(self) -> None:
+        mm = self.__map
+        block = self.__block
+        counts = array("Q", [0])
+        total = 0
+        for pos in range(self.start, self.end, block):
+            total += mm[pos : min(pos + block, self.end)].count(b"\n")
+            counts.append(total)
+
+        self.__counts = counts
+        last_line_open = self.end > self.start and mm[self.end - 1 : self.end] != b"\n"
+        self.__length = total + last_line_open
+
+
+def _decode(line: bytes) -> str:
+    if line.endswith(b"\r"):
+        line = line[:-1]
+    return line.decode("utf-8", "surrogateescape")
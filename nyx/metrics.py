@@ -0,0 +1,137 @@
+"""Counters, throughput windows and latency histograms for Nyx.run() and gather_bounded()"""
+
+import json
+import sys
+import threading
+import time
+from array import array
+from collections.abc import Iterable, Iterator
+
+# rates are reported over these windows (seconds)
+_WINDOWS = (1, 10, 60)
+# per-second finish counts are kept in a ring this long, more than the biggest window
+_SLOTS = 64
+# bucket i counts latencies below 2**i microseconds, the last one everything longer (~18 min)
+_BUCKETS = 31
+
+
+class Metrics:
+    """
+    Cheap always-on instrumentation of a task runner.
+
+    Every update is a few integer operations under one lock: no per-task allocations, a fixed
+    ring of per-second counts for the sliding-window rates and fixed log2-scale latency buckets
+    (1us, 2us, 4us, ...), so the cost doesn't grow with the number of tasks.
+    """
+
+    def __init__(self) -> None:
+        # reentrant, a SIGUSR1 dump runs on the main thread and may interrupt an update
+        self.__lock = threading.RLock()
+        self.__started = time.monotonic()
+        self.__submitted = 0
+        self.__completed = 0
+        self.__failed = 0
+        # second each ring slot belongs to, and how many tasks finished in it
+        self.__seconds = array("q", [-1] * _SLOTS)
+        self.__counts = array("Q", [0] * _SLOTS)
+        self.__buckets = array("Q", [0] * _BUCKETS)
+        self.__latency_sum = 0.0
+        self.__latency_max = 0.0
+        self.__log_lines = 0
+        self.__log_seconds = 0.0
+
+    def submit(self, count: int = 1) -> None:
+        with self.__lock:
+            self.__submitted += count
+
+    def counted(self, targets: Iterable) -> Iterator:
+        """Yields targets, counting every one as submitted when it's pulled."""
+        submit = self.submit
+        for target in targets:
+            submit()
+            yield target
+
+    def finish(self, latency: float, failed: bool = False, count: int = 1) -> None:
+        """Records count tasks that finished after `latency` seconds each."""
+        bucket = min(int(latency * 1_000_000).bit_length(), _BUCKETS - 1)
+        second = int(time.monotonic())
+        slot = second % _SLOTS
+        with self.__lock:
+            if failed:
+                self.__failed += count
+            else:
+                self.__completed += count
+            if self.__seconds[slot] != second:
+                self.__seconds[slot] = second
+                self.__counts[slot] = 0
+            self.__counts[slot] += count
+            self.__buckets[bucket] += count
+            self.__latency_sum += latency * count
+            if latency > self.__latency_max:
+                self.__latency_max = latency
+
+    def log_write(self, seconds: float) -> None:
+        """Records one log line that took `seconds` to hand to the terminal/sink."""
+        with self.__lock:
+            self.__log_lines += 1
+            self.__log_seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            now = time.monotonic()
+            second = int(now)
+            uptime = now - self.__started
+            finished = self.__completed + self.__failed
+            rates = {}
+            for window in _WINDOWS:
+                # whole seconds only, the current one is still filling up
+                total = sum(
+                    count
+                    for slot_second, count in zip(self.__seconds, self.__counts)
+                    if second - window <= slot_second < second
+                )
+                rates[f"{window}s"] = total / window
+            rates["avg"] = finished / uptime if uptime > 0 else 0.0
+
+            return {
+                "uptime": uptime,
+                "submitted": self.__submitted,
+                "completed": self.__completed,
+                "failed": self.__failed,
+                "in_flight": self.__submitted - finished,
+                "rate": rates,
+                "latency": {
+                    "mean": self.__latency_sum / finished if finished else 0.0,
+                    "max": self.__latency_max,
+                    "p50": self.__percentile(finished, 0.5),
+                    "p90": self.__percentile(finished, 0.9),
+                    "p99": self.__percentile(finished, 0.99),
+                    # upper bound in microseconds -> tasks, empty buckets left out
+                    "buckets": {
+                        str(1 << i): count for i, count in enumerate(self.__buckets) if count
+                    },
+                },
+                "log": {"lines": self.__log_lines, "seconds": self.__log_seconds},
+            }
+
+    def dump(self, path: str | None = None) -> None:
+        """Writes the snapshot as one JSON line to path, or to stderr if path is None or "-"."""
+        line = json.dumps(self.snapshot()) + "\n"
+        if path is None or path == "-":
+            sys.stderr.write(line)
+            sys.stderr.flush()
+        else:
+            with open(path, "w") as f:
+                f.write(line)
+
+    def __percentile(self, finished: int, fraction: float) -> float:
+        """Upper bound (seconds) of the bucket holding the given fraction of finished tasks."""
+        if not finished:
+            return 0.0
+        rank = finished * fraction
+        seen = 0
+        for i, count in enumerate(self.__buckets):
+            seen += count
+            if seen >= rank:
+                return min((1 << i) / 1_000_000, self.__latency_max)
+        return self.__latency_max
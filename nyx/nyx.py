@@ -1,15 +1,150 @@
 """CLI parser library designed for making hacking/pentesting tools"""
 
 # TODO: ADD CUSTOM THEMES IN THE FUTURE
-# TODO: FIX ASYNC
-# TODO: add auto type conversion
 
+import atexit
+import keyword
 import os
-import re
-import socket
 import sys
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterable, Callable, Iterable, Iterator, Mapping
+from functools import cache, partial
+from itertools import islice
+from types import MappingProxyType
+
+# everything else (re, socket, json, threading, asyncio, concurrent.futures and the
+# lines/ports/ranges modules) is imported by the validators and runners that need it,
+# most runs of a tool are short and never touch them. tests/test_startup.py keeps it so.
+
+
+# lowest to highest, config(level=...) shows the given level and everything after it
+_LEVELS = ("info", "success", "warning", "error")
+
+class NyxError(Exception):
+    """Base class for errors raised by Nyx."""
+
+
+class ArgumentError(NyxError):
+    """Raised by a compiled parser when argv is invalid. errors has one message per problem."""
+
+    def __init__(self, *errors: str) -> None:
+        super().__init__("\n".join(errors))
+        self.errors = list(errors)
+
+
+class HelpRequested(NyxError):
+    """Raised by a compiled parser when -h/--help is passed. str() of it is the help text."""
+
+
+_LABELS = {
+    "success": "SUCCESS: ",
+    "error": "ERROR: ",
+    "warning": "WARNING: ",
+    "info": "INFO: ",
+}
+
+@cache
+def _themes() -> dict:
+    """Symbol and color of every level for each theme, built the first time one is picked."""
+    return {
+        "default": {
+            "success": ("✔", "\033[92m"),
+            "error": ("✖", "\033[5;91m"),
+            "warning": ("!", "\033[93m"),
+            "info": ("*", "\033[96m"),
+        },
+        "anon": {
+            "success": ("□", "\033[97m"),
+            "error": ("■", "\033[91m"),
+            "warning": ("▲", "\033[93m"),
+            "info": ("○", "\033[90m"),
+        },
+        "hack": {
+            "success": ("++", "\033[92m"),
+            "error": ("--", "\033[91m"),
+            "warning": ("##", "\033[93m"),
+            "info": ("@@", "\033[94m"),
+        },
+        "cyber": {
+            "success": ("**", "\033[96m"),
+            "error": ("XX", "\033[91m"),
+            "warning": ("!!", "\033[33m"),
+            "info": ("##", "\033[34m"),
+        },
+        "ghost": {
+            "success": ("~~", "\033[97m"),
+            "error": ("XX", "\033[91m"),
+            "warning": ("^^", "\033[35m"),
+            "info": ("__", "\033[90m"),
+        },
+        "virus": {
+            "success": ("++", "\033[92m"),
+            "error": ("**", "\033[91m"),
+            "warning": ("!!", "\033[93m"),
+            "info": ("##", "\033[96m"),
+        },
+        "pwn": {
+            "success": ("^_^", "\033[35m"),
+            "error": ("X_X", "\033[91m"),
+            "warning": ("#_#", "\033[93m"),
+            "info": ("*_*", "\033[97m"),
+        },
+        "stealth": {
+            "success": ("~~~", "\033[90m"),
+            "error": ("***", "\033[91m"),
+            "warning": ("---", "\033[90m"),
+            "info": ("+++", "\033[94m"),
+        },
+        "binary": {
+            "success": ("00", "\033[92m"),
+            "error": ("01", "\033[91m"),
+            "warning": ("!!", "\033[93m"),
+            "info": ("??", "\033[96m"),
+        },
+        "glitch": {
+            "success": ("%%%", "\033[96m"),
+            "error": ("&&&", "\033[95m"),
+            "warning": ("###", "\033[93m"),
+            "info": ("@@@", "\033[94m"),
+        },
+        "root": {
+            "success": ("$", "\033[93m"),
+            "error": ("!", "\033[91m"),
+            "warning": ("#", "\033[33m"),
+            "info": ("&", "\033[97m"),
+        },
+    }
+
+# PhaseTimes of the profiler while --nyx-profile/--nyx-memprofile is on. the phases
+# are only timed then, otherwise it costs one global lookup per parse/log line/run
+_phases = None
+
+# '{"level":"...","ts":' heads of JSON lines, the rest is appended per call
+_JSON_HEADS = {level: f'{{"level":"{level}","ts":' for level in _LEVELS}
+# keys Nyx writes itself, keyword fields with these names are written as field_<name>
+_JSON_RESERVED = frozenset(("level", "ts", "msg", "job", "repeated"))
+
+
+def _json_str(value: str) -> str:
+    # json pulls in re, so it's only imported once JSON output is used. the first call
+    # replaces this function with the C-accelerated escaping json.dumps uses itself
+    global _json_str
+    from json.encoder import encode_basestring as _json_str
+
+    return _json_str(value)
+
+
+def _json_value(value) -> str:
+    if isinstance(value, str):
+        return _json_str(value)
+    if value is None or isinstance(value, bool):
+        return "null" if value is None else ("true" if value else "false")
+    if type(value) is int:
+        return repr(value)
+    import json
+
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":"))
 
 
 class Nyx:
@@ -35,6 +170,7 @@ class Nyx:
         """
         self.__arguments = {}
         self.__short_to_long = {}
+        self.__positionals = []
         if starting_function is not None:
             self.init(starting_function)
 
@@ -44,6 +180,45 @@ class Nyx:
 
         self.__colored_text = False
 
+        # set while gather_bounded is running so log writes don't block the event loop
+        self.__log_executor = None
+        self.__async_depth = 0
+
+        # None means every log line goes straight to print()
+        self.__sink = None
+        self.__flush_at_exit = False
+
+        # runner/log instrumentation, off until enable_metrics()
+        self.__metrics = None
+        self.__metrics_dump = None
+        self.__metrics_at_exit = False
+
+        # status line of the run() that was started with progress=True
+        self.__progress = None
+
+        # repeat collapsing and rate limits, None until one of them is turned on
+        self.__flood = None
+
+        # FindingsStore behind record(), made on first use
+        self.__findings = None
+
+        # --nyx-resume was passed, run(checkpoint=...) skips the targets finished before
+        self.__resume = False
+
+        self.__build_prefixes()
+
+        self.__level = 0
+        self.__enabled = frozenset(_LEVELS)
+        self.__verbosity_args = False
+
+        self.__jsonl = False
+
+        # batch mode tags log lines with the job running in the current worker thread
+        self.__batching = False
+        self.__job = None
+        # ',"key":' fragments of keyword fields, rendered once per key
+        self.__json_keys = {}
+
     def add_arg(
         self,
         long: str,
@@ -83,83 +258,90 @@ class Nyx:
         )
 
     #
-    def parse_args(self, namespace=None) -> "Nyx | object":
+    def parse_args(
+        self, namespace=None, argv: list[str] | None = None, slots: bool = False
+    ) -> "Nyx | object":
         """
         Parses the command-line arguments from sys.argv.
 
+        Every token is looked at exactly once. Supported forms: --name value, --name=value,
+        -n value, -nvalue, grouped short flags (-abc), negative numbers as values (--offset -5)
+        and -- to stop option parsing. Tokens that aren't options or values are collected
+        and available through get_positionals().
+
+        The reserved --nyx-profile[=FILE] and --nyx-memprofile[=FILE] flags are taken out of
+        argv and profile the rest of the run with cProfile/tracemalloc. The report is written
+        to stderr (or FILE) at exit, together with the time spent in Nyx's own phases.
+        The reserved --nyx-resume flag makes run(checkpoint=...) skip the targets a killed
+        earlier run already finished.
+
         Parameters:
         namespace (object | None): The class or object where arguments should be assigned as attributes.
                                    If None, the current Nyx object will be used.
+        argv (list[str] | None): Arguments to parse, without the program name.
+                                 If None, sys.argv[1:] is used.
+        slots (bool): Return a generated object with one __slots__ field per argument instead of
+                      the namespace. Reading it is plain attribute access, which is faster in
+                      tight loops than going through Nyx. Default is False.
 
         Returns:
-        Nyx | object: Returns the namespace object (Nyx or any passed object).
+        Nyx | object: Returns the namespace object (Nyx or any passed object), or the generated
+                      ParseResult if slots is True.
         """
         if namespace is None:
             namespace = self
+        if argv is None:
+            argv = sys.argv[1:]
+        argv, reserved = _split_reserved(argv)
+        _start_profiling(reserved)
+        self.__resume = "resume" in reserved
 
-        arg_name = None
-        provided_args = set()
+        try:
+            result = self.compile().parse(argv)
+        except HelpRequested:
+            self.__print_help()
+            sys.exit(0)
+        except ArgumentError as e:
+            self.__print_error(*e.errors)
 
-        for i, arg in enumerate(sys.argv[1:]):
-            self.__handle_help(arg)
-            arg_name = self.__get_arg_name(arg)
-            self.__process_argument(arg_name, i + 1, namespace, provided_args)  # pyright: ignore[reportArgumentType]
+        for name in result.provided:
+            value = getattr(result, name)
+            self.__arguments[name]["value"] = value
+            setattr(namespace, name, value)
+        self.__positionals = result.positionals
 
-        self.__check_missing_args(provided_args)
-        return namespace
+        if self.__verbosity_args:
+            self.__apply_verbosity()
+        return result if slots else namespace
 
-    def __print_error(self, message: str):
-        if self.__colored_text:
-            print(f"{self.__error}Error: {message}{self.__text_color}")
-        else:
-            print(f"Error: {message}")
-        sys.exit(1)
+    def compile(self) -> "CompiledParser":
+        """
+        Freezes the arguments added so far into a reusable parser.
 
-    def __handle_help(self, arg: str):
-        if arg in ("--help", "-h"):
-            self.__print_help()
-            sys.exit(0)
+        The compiled parser never touches this Nyx object or sys.argv and never exits:
+        parse(argv) returns a new ParseResult and raises ArgumentError (or HelpRequested)
+        instead. It can be shared between threads to parse many argv lists in one process.
 
-    def __get_arg_name(self, arg: str):
-        if arg.startswith("--"):
-            return arg.lstrip("-")
-        elif len(arg) == 2:
-            return self.__short_to_long.get(arg.lstrip("-"))
-        return None
+        Returns:
+        CompiledParser: Parser for the current argument spec.
+        """
+        return CompiledParser(self.__arguments, self.__short_to_long, self.__help_text())
 
-    def __process_argument(
-        self, arg_name: str, next_arg_index: int, namespace, provided_args: set
-    ):
-        if arg_name and arg_name in self.__arguments:
-            provided_args.add(arg_name)
-            has_next_value = next_arg_index < len(sys.argv) - 1 and not sys.argv[
-                next_arg_index + 1
-            ].startswith("-")
-
-            if has_next_value:
-                arg_value = sys.argv[next_arg_index + 1]
-                self.__arguments[arg_name]["value"] = arg_value
-                setattr(namespace, arg_name, arg_value)
-                self.__validate_type(arg_name, arg_value)
+    def get_positionals(self) -> list[str]:
+        """
+        Returns tokens from the last parse_args call that weren't options or option values,
+        including everything after --.
+        """
+        return list(self.__positionals)
+
+    def __print_error(self, *messages: str):
+        for message in messages:
+            if self.__colored_text:
+                self.__write(f"{self.__error}Error: {message}{self.__text_color}", flush=True)
             else:
-                if self.__arguments[arg_name]["required"]:
-                    self.__print_error(
-                        f"Argument '--{arg_name}' requires a value but none was provided."
-                    )
-                else:
-                    self.__arguments[arg_name]["value"] = True
-                    setattr(namespace, arg_name, True)
-
-    def __check_missing_args(self, provided_args: set):
-        missing_args = [
-            arg
-            for arg, details in self.__arguments.items()
-            if details.get("required") and arg not in provided_args
-        ]
-        if missing_args:
-            self.__print_error(
-                f"The following required arguments are missing: {', '.join(missing_args)}"
-            )
+                self.__write(f"Error: {message}", flush=True)
+        self.flush()
+        sys.exit(1)
 
     #
     def config(
@@ -168,6 +350,8 @@ class Nyx:
         example_input: str = "",
         color_text: bool = False,
         theme: str = "",
+        level: str | None = None,
+        output: str | None = None,
     ):
         """
         Sets the program description, example usage, and color settings for output.
@@ -178,6 +362,10 @@ class Nyx:
                              Format: '--test main.py --time True'.
         color_text (bool): Whether to print colored text in logs. Default is False.
         theme (str):
+        level (str | None): Lowest log level that is printed: "info", "success", "warning" or "error".
+                            Everything below it is skipped before any formatting. Default is None (unchanged).
+        output (str | None): "text" for the usual colored lines or "jsonl" for one JSON object per
+                             log call (level, ts, msg and any keyword fields). Default is None (unchanged).
 
         Returns:
         None
@@ -199,6 +387,77 @@ class Nyx:
         if theme != "":
             self.__pick_theme(theme)
 
+        if level is not None:
+            self.__set_level(level)
+
+        if output is not None:
+            if output not in ("text", "jsonl"):
+                raise ValueError(f"Invalid output '{output}', expected 'text' or 'jsonl'")
+            self.__jsonl = output == "jsonl"
+
+    def __set_level(self, level: str | int) -> None:
+        if isinstance(level, str):
+            if level not in _LEVELS:
+                raise ValueError(
+                    f"Invalid log level '{level}', expected one of: {', '.join(_LEVELS)}"
+                )
+            level = _LEVELS.index(level)
+        self.__level = min(max(level, 0), len(_LEVELS) - 1)
+        self.__enabled = frozenset(_LEVELS[self.__level :])
+
+    def enable_level(self, *levels: str) -> None:
+        """
+        Turns printing on for the given log levels, e.g. nyx.enable_level("info").
+
+        Parameters:
+        levels (str): Any of "info", "success", "warning", "error".
+
+        Returns:
+        None
+        """
+        self.__enabled = self.__enabled | self.__check_levels(levels)
+
+    def disable_level(self, *levels: str) -> None:
+        """
+        Turns printing off for the given log levels, e.g. nyx.disable_level("success").
+
+        Parameters:
+        levels (str): Any of "info", "success", "warning", "error".
+
+        Returns:
+        None
+        """
+        self.__enabled = self.__enabled - self.__check_levels(levels)
+
+    def __check_levels(self, levels: tuple) -> frozenset:
+        for level in levels:
+            if level not in _LEVELS:
+                raise ValueError(
+                    f"Invalid log level '{level}', expected one of: {', '.join(_LEVELS)}"
+                )
+        return frozenset(levels)
+
+    def add_verbosity_args(self) -> None:
+        """
+        Registers the built-in -q/--quiet and -v/--verbose flags.
+        After parse_args, -q hides one more log level (starting with info) and -v shows one more.
+
+        Returns:
+        None
+        """
+        self.add_arg(long="quiet", short="q", description="Show less output", arg_type="flag")
+        self.add_arg(long="verbose", short="v", description="Show more output", arg_type="flag")
+        self.__verbosity_args = True
+
+    def __apply_verbosity(self) -> None:
+        shift = 0
+        if self.__arguments["quiet"]["value"] is not None:
+            shift += 1
+        if self.__arguments["verbose"]["value"] is not None:
+            shift -= 1
+        if shift:
+            self.__set_level(self.__level + shift)
+
     def __print_help(self):
         """
         Prints the help message with program description, usage, and available options.
@@ -206,19 +465,23 @@ class Nyx:
         Returns:
         None
         """
+        print(self.__help_text())
+
+    def __help_text(self) -> str:
         script_name = os.path.basename(sys.argv[0])
-        print(
+        lines = [
             f"""{self.__program_description}
 
 Usage: {script_name} {self.__example_usage}
 
 Options:"""
-        )
+        ]
         for i in self.__help_options:
             if i:
-                print(
+                lines.append(
                     f"\t--{i['long']},\t-{i['short']}\trequired: {i['required']}\t {i['description']}"
                 )
+        return "\n".join(lines)
 
     #
     def init(self, func: Callable) -> None:
@@ -248,125 +511,517 @@ Options:"""
             super().__setattr__(name, value)
 
     # the "cool ui part etc"
-    def __print_log(
-        self, message: str, color: str, symbol: str, is_colored: bool
-    ) -> None:
-        if is_colored:
-            print(
-                f"{self.__text_color}[{color}{symbol}{self.__text_color}] {color}{message}{self.__text_color}"
-            )
-        else:
-            print(
-                f"{self.__text_color}[{color}{symbol}{self.__text_color}] {self.__text_color}{message}"
+    def __build_prefixes(self) -> None:
+        """
+        Renders the full line prefix and suffix of every level for plain and colored mode.
+        Runs whenever the theme changes so a log call only has to join three strings.
+        """
+        text = self.__text_color
+        styles = {
+            "success": (self.__success, self.__succes_sym),
+            "error": (self.__error, self.__err_sym),
+            "warning": (self.__warning, self.__warn_sym),
+            "info": (self.__info, self.__info_sym),
+        }
+        self.__prefixes = {}
+        for level, (color, symbol) in styles.items():
+            bracket = f"{text}[{color}{symbol}{text}] "
+            label = _LABELS[level]
+            # indexed by is_colored: [0] plain, [1] colored
+            self.__prefixes[level] = (
+                (f"{bracket}{text}{label}", ""),
+                (f"{bracket}{color}{label}", text),
             )
 
-    def __log_with_symbol(
-        self, log: str, color: str, symbol: str, color_text: bool
+    def __log(
+        self,
+        level: str,
+        log,
+        args: tuple,
+        color_text: bool,
+        fields: dict,
+        flush: bool = False,
     ) -> None:
         """
         A helper method to reduce repetition for success, error, warning, and info methods.
         This handles both colored and non-colored output logic.
         """
+        flood = self.__flood
+        if flood is not None and not flood.allow(level):
+            return
+
+        # message is only built here, after the level and rate checks
+        if args:
+            log = log % args
+        elif callable(log):
+            log = log()
+        if not isinstance(log, str):
+            log = str(log)
+
+        if self.__jsonl and fields and not _JSON_RESERVED.isdisjoint(fields):
+            # duplicate keys would make parsers keep only one of the two
+            fields = {
+                f"field_{key}" if key in _JSON_RESERVED else key: value
+                for key, value in fields.items()
+            }
+
+        if self.__batching:
+            job = getattr(self.__job, "number", None)
+            if job is not None:
+                if self.__jsonl:
+                    fields = {"job": job, **fields}
+                else:
+                    log = f"[job {job}] {log}"
+
+        repeated = 0
+        if flood is not None:
+            repeated = flood.repeat(level, log, color_text, fields)
+            if repeated is None:
+                return
+        self.__render(level, log, color_text, fields, flush, repeated)
+        if flood is not None and flood.evicted:
+            self.__write_repeats(flood.take_repeats(evicted_only=True))
+
+    def __render(
+        self,
+        level: str,
+        log: str,
+        color_text: bool,
+        fields: dict,
+        flush: bool = False,
+        repeated: int = 0,
+    ) -> None:
+        if self.__jsonl:
+            if repeated:
+                fields = {**fields, "repeated": repeated}
+            self.__write(self.__json_line(level, log, fields), flush)
+            return
+
+        if fields:
+            log = " ".join([log, *(f"{key}={value}" for key, value in fields.items())])
+        if repeated:
+            log = f"{log} (repeated {repeated} times)"
         is_colored = color_text if color_text is not None else self.__colored_text
-        self.__print_log(message=log, color=color, symbol=symbol, is_colored=is_colored)
+        prefix, suffix = self.__prefixes[level][bool(is_colored)]
+        self.__write("".join((prefix, log, suffix)), flush)
+
+    def __write_repeats(self, repeats: list) -> None:
+        for level, log, color_text, fields, count in repeats:
+            self.__render(level, log, color_text, fields, level == "error", count)
+
+    def __json_line(self, level: str, log: str, fields: dict) -> str:
+        parts = [_JSON_HEADS[level], repr(time.time()), ',"msg":', _json_str(log)]
+        if fields:
+            keys = self.__json_keys
+            for key, value in fields.items():
+                fragment = keys.get(key)
+                if fragment is None:
+                    fragment = keys[key] = f",{_json_str(key)}:"
+                parts.append(fragment)
+                parts.append(_json_value(value))
+        parts.append("}")
+        return "".join(parts)
+
+    def __write(self, line: str, flush: bool = False) -> None:
+        executor = self.__log_executor
+        if executor is None:
+            self.__emit(line, flush)
+        else:
+            # single worker keeps lines in order and the event loop never waits on the terminal
+            executor.submit(self.__emit, line, flush)
+
+    def __emit(self, line: str, flush: bool) -> None:
+        metrics = self.__metrics
+        phases = _phases
+        if metrics is not None or phases is not None:
+            start = time.perf_counter()
+        progress = self.__progress
+        if progress is not None:
+            # the status line is taken off the terminal while the log line is written
+            progress.pause()
+        sink = self.__sink
+        try:
+            if sink is None:
+                # one write call so lines from different threads never split mid-line
+                sys.stdout.write(line + "\n")
+            else:
+                sink.write(line, flush)
+        finally:
+            if progress is not None:
+                progress.resume()
+        if metrics is not None or phases is not None:
+            elapsed = time.perf_counter() - start
+            if metrics is not None:
+                metrics.log_write(elapsed)
+            if phases is not None:
+                phases.add("log", elapsed)
+
+    def buffer_output(
+        self,
+        enabled: bool = True,
+        stream=None,
+        flush_lines: int = 1000,
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float | None = 1.0,
+    ) -> None:
+        """
+        Collects log lines in memory and writes them out in batches instead of one write per line.
 
-    # TODO: fix handling logic if global config color is false it should not color it by default
+        A batch is flushed when any limit is hit, on every error() and when the program exits.
+        Useful when stdout is a pipe or a file and tools log hundreds of thousands of lines.
+
+        Parameters:
+        enabled (bool): Turn buffering on or off. Turning it off flushes what's buffered. Default is True.
+        stream (file-like | None): Where batches are written. Default is sys.stdout.
+        flush_lines (int): Flush after this many lines. Default is 1000.
+        flush_bytes (int): Flush after roughly this many characters. Default is 64 KiB.
+        flush_interval (float | None): Write a buffered line at most this many seconds after it
+                                       was logged (a timer thread flushes quiet buffers).
+                                       None disables it. Default is 1.0.
 
-    def success(self, log: str, color_text=True) -> None:
-        """With default theme prints out [✔] and log in green."""
-        log = f"SUCCESS: {log}"
-        self.__log_with_symbol(log, self.__success, self.__succes_sym, color_text)
-
-    def error(self, log: str, color_text=True) -> None:
-        """With default theme prints out [✖] and log in red."""
-        log = f"ERROR: {log}"
-        self.__log_with_symbol(log, self.__error, self.__err_sym, color_text)
-
-    def warning(self, log: str, color_text=True) -> None:
-        """With default theme prints out [!] and log in yellow."""
-        log = f"WARNING: {log}"
-        self.__log_with_symbol(log, self.__warning, self.__warn_sym, color_text)
-
-    def info(self, log: str, color_text=True) -> None:
-        """With default theme prints out [*] and log in blue."""
-        log = f"INFO: {log}"
-        self.__log_with_symbol(log, self.__info, self.__info_sym, color_text)
-
-    def __validate_type(self, arg_name: str, value: str):
-        arg_type = self.__arguments[arg_name].get("type")
-        if arg_type == "int" and not self.__is_valid_int(value):
-            self.__print_error(f"Invalid integer value for '{arg_name}': {value}")
-        elif arg_type == "float" and not self.__is_valid_float(value):
-            self.__print_error(f"Invalid float value for '{arg_name}': {value}")
-        elif arg_type == "str" and not self.__is_valid_string(value):
-            self.__print_error(f"Invalid string value for '{arg_name}': {value}")
-        elif arg_type == "url" and not self.__is_valid_url(value):
-            self.__print_error(f"Invalid URL provided for '{arg_name}': {value}")
-        elif arg_type == "ip" and not self.__is_valid_ip(value):
-            self.__print_error(f"Invalid IP address for '{arg_name}': {value}")
-        elif arg_type == "port" and not self.__is_valid_port(value):
-            self.__print_error(f"Invalid port for '{arg_name}': {value}")
-        elif arg_type == "file" and not os.path.isfile(value):
-            self.__print_error(f"File does not exist or cannot be read: {value}")
-        elif arg_type == "dir" and not os.path.isdir(value):
-            self.__print_error(f"Directory does not exist: {value}")
-        elif arg_type == "email" and not self.__is_valid_email(value):
-            self.__print_error(f"Invalid email address for '{arg_name}': {value}")
-
-    def __is_valid_url(self, url: str) -> bool:
-        """Validate URL with simple regex."""
-        regex = re.compile(
-            r"^(?:http|ftp)s?://"  # http:// or https://
-            r"(?:(?:[A-Z0-9](?:[A-Z0-9-]*[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]*[A-Z0-9-]{2,}\.?)|"  # domain...
-            r"localhost|"  # localhost...
-            r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|"  # ...or ipv4
-            r"\[?[A-F0-9]*:[A-F0-9:]+\]?)"  # or ipv6
-            r"(?::\d+)?"  # optional port
-            r"(?:/?|[/?]\S+)$",
-            re.IGNORECASE,
+        Returns:
+        None
+        """
+        self.__replace_sink(
+            _BufferedSink(stream, flush_lines, flush_bytes, flush_interval)
+            if enabled
+            else None
         )
-        return re.match(regex, url) is not None
 
-    def __is_valid_int(self, value: str) -> bool:
-        try:
-            int(value)
-            return True
-        except ValueError:
-            return False
+    def background_output(
+        self, enabled: bool = True, stream=None, max_batch: int = 4096
+    ) -> None:
+        """
+        Hands log lines to a single writer thread instead of writing them from the calling thread.
 
-    def __is_valid_float(self, value: str) -> bool:
-        try:
-            float(value)
-            return True
-        except ValueError:
-            return False
+        Worker threads only put finished lines on a queue, so they never wait on a slow terminal
+        or SSH session and lines from different threads can't interleave. The writer drains
+        whatever is queued and writes it in one go. Everything is flushed on exit and before
+        Nyx exits on an argument error.
 
-    def __is_valid_string(self, value: str) -> bool:
-        return isinstance(value, str) and len(value) > 0
+        Parameters:
+        enabled (bool): Turn the writer thread on or off. Turning it off drains the queue first. Default is True.
+        stream (file-like | None): Where lines are written. Default is sys.stdout.
+        max_batch (int): Maximum number of lines per write. Default is 4096.
 
-    def __is_valid_ip(self, ip: str) -> bool:
-        """Validate if the input is valid IP address."""
-        try:
-            socket.inet_pton(socket.AF_INET, ip)
-            return True
-        except socket.error:
-            try:
-                socket.inet_pton(socket.AF_INET6, ip)
-                return True
-            except socket.error:
-                return False
+        Returns:
+        None
+        """
+        self.__replace_sink(_BackgroundSink(stream, max_batch) if enabled else None)
+
+    def __replace_sink(self, sink) -> None:
+        old = self.__sink
+        self.__sink = sink
+        if old is not None:
+            old.close()
+        if sink is not None and not self.__flush_at_exit:
+            atexit.register(self.flush)
+            self.__flush_at_exit = True
+
+    def flush(self) -> None:
+        """Writes out any buffered or queued log lines, and summaries of collapsed repeats."""
+        if self.__flood is not None:
+            self.__write_repeats(self.__flood.take_repeats())
+        if self.__sink is not None:
+            self.__sink.flush()
+
+    def suppress_repeats(self, window: float | None = 5.0, max_tracked: int = 1024) -> None:
+        """
+        Collapses identical log lines so an error storm can't flood the terminal.
+
+        The first copy of a message (same level, text and fields) is printed, further copies
+        within `window` seconds are only counted. The next copy after that, or flush() and
+        program exit, prints the message once more with "(repeated N times)" appended
+        (a "repeated" key in JSON output).
+
+        Parameters:
+        window (float | None): Seconds copies of a message are collapsed. None turns it off. Default is 5.0.
+        max_tracked (int): Maximum number of distinct recent messages remembered. When it's
+                           full, the oldest one is forgotten (its count printed). Default is 1024.
+
+        Returns:
+        None
+        """
+        if window is not None and (window <= 0 or max_tracked < 1):
+            raise ValueError("window and max_tracked must be positive")
+        flood = self.__flood_guard()
+        self.__write_repeats(flood.take_repeats())
+        flood.configure_repeats(window, max_tracked)
+
+    def rate_limit(self, level: str, per_second: float | None, burst: int | None = None) -> None:
+        """
+        Caps how many lines of a level are written per second (token bucket).
+
+        Lines over the limit are dropped before they're even formatted. How many lines were
+        dropped per level is reported on stderr when the program exits.
+
+        Parameters:
+        level (str): "info", "success", "warning" or "error".
+        per_second (float | None): Lines per second allowed on average. None removes the limit.
+        burst (int | None): Lines allowed at once after a quiet period.
+                            Default is per_second (at least 1).
+
+        Returns:
+        None
+        """
+        self.__check_levels((level,))
+        if per_second is not None and per_second <= 0:
+            raise ValueError("per_second must be positive")
+        if burst is None and per_second is not None:
+            burst = max(int(per_second), 1)
+        self.__flood_guard().configure_bucket(level, per_second, burst)
+
+    def findings_store(
+        self,
+        key: Iterable[str] | None = None,
+        dedupe: str | None = "exact",
+        memory_limit: int = 256 * 1024 * 1024,
+        spill_dir: str | None = None,
+        capacity: int = 100_000_000,
+        error_rate: float = 0.001,
+    ) -> "FindingsStore":
+        """
+        Sets up the store behind record() (replacing the current one) and returns it.
+
+        Findings are kept in dictionary-encoded columns, so repeated strings are stored once,
+        and spilled to temporary files (with the dedupe digests) when the estimated size
+        passes memory_limit.
+        Duplicates are dropped by hashing the key fields, exactly or with a Bloom filter.
+
+        Parameters:
+        key (Iterable[str] | None): Fields that identify a finding. Default is None (all fields).
+        dedupe (str | None): "exact" (digests spill to disk with the rows), "approx" (fixed
+                             memory, rare false duplicates, no disk) or None. Default is "exact".
+        memory_limit (int): Estimated bytes of rows and "exact" digests kept in memory before
+                            spilling. Default is 256 MiB.
+        spill_dir (str | None): Directory for the spill file. Default is the system temp dir.
+        capacity (int): Expected unique findings, sizes the "approx" filter. Default is 100 million.
+        error_rate (float): False duplicate rate of the "approx" filter. Default is 0.001.
+
+        Returns:
+        FindingsStore: The new store.
+        """
+        from .findings import FindingsStore
+
+        if self.__findings is not None:
+            self.__findings.close()
+        self.__findings = FindingsStore(
+            key, dedupe, memory_limit, spill_dir, capacity, error_rate
+        )
+        return self.__findings
+
+    def record(self, log=None, /, **fields) -> bool:
+        """
+        Stores a finding for the final report, e.g. nyx.record("port open", host=h, port=443).
+
+        Safe to call from run() workers. With a message the finding is also logged at the
+        success level with its fields, but only the first time, duplicates stay quiet.
+        Every keyword is a field, including ones named log or color_text.
+
+        Parameters:
+        log (str | None): Message to log with success(). Default is None (don't log).
+        **fields: Values of the finding (str, int, float, bool or None).
+
+        Returns:
+        bool: True if the finding is new, False if it's a duplicate.
+        """
+        store = self.__findings
+        if store is None:
+            store = self.findings_store()
+        new = store.add(fields)
+        if new and log is not None and "success" in self.__enabled:
+            # straight to __log, fields named log or color_text are finding data here
+            self.__log("success", log, (), True, fields)
+        return new
+
+    def export_findings(self, path: str, fmt: str | None = None) -> int:
+        """
+        Writes every recorded finding to a CSV or JSONL file in one streaming pass.
+
+        Parameters:
+        path (str): Output file, "-" for stdout.
+        fmt (str | None): "csv" or "jsonl". Default is None (from the file extension, else jsonl).
+
+        Returns:
+        int: Number of findings written.
+        """
+        if self.__findings is None:
+            self.findings_store()
+        return self.__findings.export(path, fmt)
+
+    def __flood_guard(self) -> "_FloodGuard":
+        if self.__flood is None:
+            self.__flood = _FloodGuard()
+            atexit.register(self.__flood_at_exit)
+        return self.__flood
+
+    def __flood_at_exit(self) -> None:
+        self.flush()
+        dropped = self.__flood.dropped()
+        if dropped:
+            counts = ", ".join(f"{count:,} {level}" for level, count in dropped.items())
+            sys.stderr.write(f"nyx: rate limits dropped {counts} lines\n")
+            sys.stderr.flush()
+
+    def enable_metrics(
+        self, enabled: bool = True, dump: str | None = None, on_signal: bool = False
+    ) -> None:
+        """
+        Instruments run(), gather_bounded() and log writes so stats() can tell how fast a tool goes.
+
+        Tracks submitted/completed/failed tasks, tasks in flight, finished tasks per second over
+        the last 1, 10 and 60 seconds, a log-scale histogram of task latencies and the time spent
+        writing log lines. Updates are a handful of integer operations, cheap enough to leave on.
+
+        Parameters:
+        enabled (bool): Turn metrics on or off. Turning them on again starts from zero. Default is True.
+        dump (str | None): File the stats are written to as JSON when the program exits,
+                           "-" for stderr. Default is None (no dump at exit).
+        on_signal (bool): Also dump the stats whenever the process gets SIGUSR1 (to dump, or
+                          stderr if dump is None). Must be called from the main thread. Default is False.
+
+        Returns:
+        None
+        """
+        if not enabled:
+            self.__metrics = None
+            return
+        from .metrics import Metrics
+
+        self.__metrics = Metrics()
+        self.__metrics_dump = dump
+        if dump is not None and not self.__metrics_at_exit:
+            atexit.register(self.__dump_metrics_at_exit)
+            self.__metrics_at_exit = True
+        if on_signal:
+            import signal
+
+            if not hasattr(signal, "SIGUSR1"):
+                raise ValueError("SIGUSR1 isn't available on this platform")
+            signal.signal(signal.SIGUSR1, self.__dump_metrics)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+        dict: Snapshot of the metrics (see enable_metrics), empty if metrics are off.
+              Rates are tasks per second, latencies are in seconds.
+        """
+        if self.__metrics is None:
+            return {}
+        return self.__metrics.snapshot()
+
+    def __dump_metrics(self, signum=None, frame=None) -> None:
+        if self.__metrics is not None:
+            self.__metrics.dump(self.__metrics_dump)
+
+    def __dump_metrics_at_exit(self) -> None:
+        if self.__metrics_dump is not None:
+            self.__dump_metrics()
 
-    def __is_valid_port(self, port: str) -> bool:
-        """Ensure the port is within the valid range (1-65535)."""
+    # TODO: fix handling logic if global config color is false it should not color it by default
+
+    def success(self, log, /, *args, color_text=True, **fields) -> None:
+        """
+        With default theme prints out [✔] and log in green.
+
+        log can be a %-style format string with args (formatted only if the level is enabled),
+        or a callable returning the message, e.g. nyx.success("%s is open", host).
+        Keyword fields are appended as key=value, or become JSON keys with config(output="jsonl").
+        """
+        if "success" in self.__enabled:
+            self.__log("success", log, args, color_text, fields)
+
+    def error(self, log, /, *args, color_text=True, **fields) -> None:
+        """With default theme prints out [✖] and log in red. Accepts the same args as success."""
+        if "error" in self.__enabled:
+            self.__log("error", log, args, color_text, fields, flush=True)
+
+    def warning(self, log, /, *args, color_text=True, **fields) -> None:
+        """With default theme prints out [!] and log in yellow. Accepts the same args as success."""
+        if "warning" in self.__enabled:
+            self.__log("warning", log, args, color_text, fields)
+
+    def info(self, log, /, *args, color_text=True, **fields) -> None:
+        """With default theme prints out [*] and log in blue. Accepts the same args as success."""
+        if "info" in self.__enabled:
+            self.__log("info", log, args, color_text, fields)
+
+    def __convert(self, arg_name: str, value: str):
         try:
-            port_num = int(port)
-            return 1 <= port_num <= 65535
-        except ValueError:
-            return False
+            return _convert(arg_name, self.__arguments[arg_name].get("type"), value)
+        except ArgumentError as e:
+            self.__print_error(str(e))
+
+    @staticmethod
+    def register_type(
+        name: str,
+        convert: Callable[[str], object],
+        description: str = "",
+        error: str | None = None,
+        value_type: type = object,
+        cache: bool = False,
+        blocking: bool = False,
+    ) -> None:
+        """
+        Adds a custom arg_type (or replaces a built-in one) for every Nyx instance.
+
+        Parameters:
+        name (str): Name used as arg_type, e.g. "hostname".
+        convert (Callable): Takes the raw string and returns the parsed value.
+                            Raise ValueError, TypeError or LookupError if the value is invalid.
+        description (str): Shown by get_types() and in interactive prompts.
+        error (str | None): Error message, may use {name} (argument) and {value}.
+                            Default is "Invalid <type> value for '{name}': {value}".
+        value_type (type): Python type of the parsed value, used for annotations. Default is object.
+        cache (bool): Whether converted values may be reused from the validation cache. Only
+                      for converters whose result depends on the value alone. Default is False.
+        blocking (bool): Whether convert waits on I/O (stat, DNS lookups). Such values are
+                         validated concurrently with each other. Default is False.
 
-    def __is_valid_email(self, email: str) -> bool:
-        """Simple regex to check if email format is valid."""
-        return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
+        Returns:
+        None
+        """
+        if error is None:
+            error = f"Invalid {name} value for '{{name}}': {{value}}"
+        _TYPES[name] = _ArgType(
+            convert,
+            description or name,
+            error,
+            value_type,
+            "value" if cache else None,
+            blocking,
+        )
+        # entries converted by the replaced type are stale now
+        _validation_cache().clear()
+
+    @staticmethod
+    def validation_cache(maxsize: int = 4096, ttl: float = 2.0) -> None:
+        """
+        Configures the LRU cache of validated argument values shared by every parser.
+
+        Values of types like url, ip, email, ports and cidr are converted once and reused, so
+        repeated parses of the same arguments (batch jobs, compiled parsers, interactive retries)
+        skip validation. Results of file and dir checks expire after ttl seconds so changes on
+        disk are noticed. Only valid values are cached. Configuring the cache empties it.
+
+        Parameters:
+        maxsize (int): Maximum number of cached values, 0 turns the cache off. Default is 4096.
+        ttl (float): Seconds a file/dir check stays valid, 0 never caches them. Default is 2.0.
+
+        Returns:
+        None
+        """
+        if maxsize < 0 or ttl < 0:
+            raise ValueError("maxsize and ttl can't be negative")
+        _validation_cache().configure(maxsize, ttl)
+
+    @staticmethod
+    def validation_cache_info() -> dict:
+        """
+        Returns:
+        dict: "hits", "misses", "size" and "maxsize" of the validation cache.
+        """
+        return _validation_cache().info()
 
     # it would be cool to pass array of symbols
     # optionals should be also displayed to users
@@ -379,17 +1034,7 @@ Options:"""
 
         returns -> None
         """
-        type_map = {
-            "int": "integer (e.g., 123)",
-            "float": "floating point number (e.g., 12.34)",
-            "string": "a string of text",
-            "url": "a valid URL (e.g., https://example.com)",
-            "ip": "a valid IP address (e.g., 192.168.1.1)",
-            "port": "a valid port number (1-65535)",
-            "file": "a valid file path (e.g., /path/to/file)",
-            "dir": "a valid directory path (e.g., /path/to/directory)",
-            "email": "a valid email address (e.g., user@example.com)",
-        }
+        type_map = {name: spec.description for name, spec in _TYPES.items()}
 
         if color is not None:
             match color:
@@ -421,9 +1066,9 @@ Options:"""
                         user_input = input(f"[{symbol}] Enter {arg} ({type_message}): ")
 
                     try:
-                        self.__validate_type(arg, user_input)
-                        self.__arguments[arg]["value"] = user_input
-                        setattr(self, arg, user_input)
+                        value = self.__convert(arg, user_input)
+                        self.__arguments[arg]["value"] = value
+                        setattr(self, arg, value)
                         break
                     except Exception as e:
                         self.__print_error(f"Error {str(e)}")
@@ -445,36 +1090,380 @@ Options:"""
                             self.__arguments[arg]["value"] = user_input
                             break
                         else:
-                            self.__validate_type(arg, user_input)
-                            self.__arguments[arg]["value"] = user_input
-                            setattr(self, arg, user_input)
+                            value = self.__convert(arg, user_input)
+                            self.__arguments[arg]["value"] = value
+                            setattr(self, arg, value)
                             break
                     except Exception as e:
                         self.__print_error(f"Error {str(e)}")
 
     #
-    def __run_async(self, func, *args, **kwargs):
-        """Run a function asynchronously with multiple threads."""
-        threads = kwargs.get("threads", 10)
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            future = executor.submit(func, *args, **kwargs)
-            return future.result()
+    def run(
+        self,
+        func: Callable,
+        targets: Iterable,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        mode: str = "thread",
+        ordered: bool = False,
+        chunksize: int | None = None,
+        progress: bool = False,
+        total: int | None = None,
+        checkpoint: str | None = None,
+        key: Callable | None = None,
+        resume: bool | None = None,
+    ) -> Iterator:
+        """
+        Runs func once for every target on a pool of workers and yields results as they finish.
+
+        Targets are pulled lazily, so at most max_pending tasks are ever submitted at once.
+        This keeps memory flat even for huge target lists (e.g. a file with millions of hosts).
+
+        Use mode="thread" for I/O-bound work (sockets, HTTP) and mode="process" for CPU-bound
+        work (hash cracking, payload mutation). In process mode targets are sent to workers in
+        chunks, and unless chunksize is given the chunk size adapts to how long each item takes
+        so that pickling and IPC don't dominate. func and targets must be picklable there.
+
+        Parameters:
+        func (Callable): Function called as func(target) for every target.
+        targets (Iterable): Targets to process, consumed lazily.
+        workers (int | None): Number of worker threads/processes.
+                              Default is 10 threads, or one process per CPU core.
+        max_pending (int | None): Maximum number of submitted but unfinished tasks (chunks in
+                                  process mode). Default is workers * 2.
+        mode (str): "thread" or "process". Default is "thread".
+        ordered (bool): Yield results in the same order as targets instead of completion order.
+                        Default is False.
+        chunksize (int | None): Fixed number of targets per chunk in process mode.
+                                Default is None (adaptive).
+        progress (bool): Show completed/total, rate and ETA on stderr. On a terminal it's one
+                         status line redrawn at most 10 times a second (log lines are written
+                         above it), otherwise a summary line every 10 seconds. Default is False.
+        total (int | None): Number of targets for the percentage and ETA.
+                            Default is len(targets) if targets has a length.
+        checkpoint (str | None): File where the key of every finished target is appended
+                                 (fsync'ed in batches), so a killed run can be resumed.
+                                 A target counts as finished once the loop over the results
+                                 asks for the next one after it. Default is None (no checkpoint).
+        key (Callable | None): key(target) -> int or str identifying a target across runs.
+                               Default is None (position in targets, e.g. the line of a
+                               LineFile or the address offset of an IPRangeSet).
+        resume (bool | None): Skip the targets already in the checkpoint and append to it,
+                              instead of starting it empty. Default is None (True if
+                              --nyx-resume was passed to parse_args).
+
+        Returns:
+        Iterator: Results of func.
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Invalid run mode '{mode}', expected 'thread' or 'process'")
+        if workers is None:
+            workers = 10 if mode == "thread" else os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        max_pending = max(max_pending or workers * 2, 1)
+
+        status = None
+        if progress and self.__progress is None:
+            if total is None and hasattr(targets, "__len__"):
+                try:
+                    total = len(targets)
+                except (OverflowError, TypeError):
+                    # len() stops at sys.maxsize, IPRangeSet has the exact count in size
+                    size = getattr(targets, "size", None)
+                    total = size if isinstance(size, int) else None
+            # the writer thread prints lines later, an in-place status line would end up between them
+            status = _Progress(total, live=not isinstance(self.__sink, _BackgroundSink))
+
+        done = None
+        if checkpoint is not None:
+            from .checkpoint import Checkpoint
+
+            done = Checkpoint(checkpoint, self.__resume if resume is None else resume)
+            # from here on targets are (key, target) pairs and results (key, result) pairs
+            targets = _pending(done, targets, key, status)
+
+        # checked and set up above, so bad arguments raise here and not on the first next()
+        return self.__run(
+            func, targets, workers, max_pending, mode, ordered, chunksize, status, done
+        )
+
+    def __run(
+        self,
+        func: Callable,
+        targets: Iterable,
+        workers: int,
+        max_pending: int,
+        mode: str,
+        ordered: bool,
+        chunksize: int | None,
+        status: "_Progress | None",
+        done,
+    ) -> Iterator:
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        metrics = self.__metrics
+        if metrics is not None:
+            targets = metrics.counted(targets)
+
+        if status is not None:
+            self.__progress = status
+        started = time.perf_counter()
+        try:
+            if mode == "thread":
+                if metrics is not None:
+                    func = partial(_measured, metrics, func)
+                if done is not None:
+                    func = partial(_keyed, func)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = _bounded_map(executor, func, targets, max_pending, ordered)
+                    if status is not None:
+                        results = status.track(results)
+                    yield from results if done is None else _checkpointed(done, results)
+                return
+
+            if done is not None:
+                func = partial(_keyed, func)
+            chunker = _Chunker(targets, chunksize)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunks = _bounded_map(
+                    executor, partial(_run_chunk, func), chunker, max_pending, ordered
+                )
+                try:
+                    for results, elapsed in chunks:
+                        chunker.record(len(results), elapsed)
+                        if metrics is not None and results:
+                            # workers only report per chunk, so every item gets the chunk's average
+                            metrics.finish(elapsed / len(results), count=len(results))
+                        if status is not None:
+                            status.advance(len(results))
+                        yield from results if done is None else _checkpointed(done, results)
+                except Exception:
+                    if metrics is not None:
+                        metrics.finish(0.0, failed=True)
+                    raise
+                finally:
+                    chunks.close()
+        finally:
+            if status is not None:
+                self.__progress = None
+                status.close()
+            if done is not None:
+                done.close()
+            if _phases is not None:
+                # wall time from the first result asked for to the last one handed out
+                _phases.add("runner", time.perf_counter() - started)
+
+    def dispatch(self, entry: Callable, argv: list[str] | None = None, workers: int = 8) -> int:
+        """
+        Runs the tool's entry function for this invocation, or once per job in batch mode.
+
+        Normally the arguments are parsed like parse_args(slots=True) and entry(args) is called once.
+        With --nyx-batch FILE (or --nyx-batch - for stdin) every non-empty line of FILE that
+        doesn't start with # is split like a shell command line, parsed with the same argument
+        spec and passed to entry on a pool of worker threads, so interpreter startup, imports and
+        the banner are paid once for the whole job list. Other arguments next to --nyx-batch are
+        put in front of every job. Log lines written during a job are tagged with its line number.
+
+        A job fails when entry returns a non-zero int, raises (SystemExit included) or its line
+        doesn't parse. Failures are logged and counted, the other jobs keep running.
+
+        Parameters:
+        entry (Callable): Tool entry point, called as entry(args) with the parsed arguments.
+        argv (list[str] | None): Arguments without the program name. If None, sys.argv[1:] is used.
+        workers (int): Number of jobs running at once in batch mode. Default is 8.
+
+        Returns:
+        int: Exit status, e.g. sys.exit(nyx.dispatch(main)). In batch mode 0 only if every job succeeded.
+        """
+        if argv is None:
+            argv = sys.argv[1:]
+        base, reserved = _split_reserved(argv)
+        batch_file = reserved.get("batch")
+
+        if batch_file is None:
+            status = entry(self.parse_args(argv=argv, slots=True))
+            return status if isinstance(status, int) else 0
+        _start_profiling(reserved)
+        self.__resume = "resume" in reserved
+
+        import contextlib
+        import threading
+
+        try:
+            jobs = open(batch_file) if batch_file != "-" else contextlib.nullcontext(sys.stdin)
+        except OSError as e:
+            self.__print_error(f"Cannot read batch file {batch_file}: {e.strerror}")
+
+        parser = self.compile()
+        run_job = partial(self.__run_job, entry, parser, base)
+        total = failed = 0
+        self.__job = threading.local()
+        self.__batching = True
+        try:
+            with jobs as lines:
+                numbered = (
+                    (number, line)
+                    for number, line in enumerate(lines, 1)
+                    if line.strip() and not line.lstrip().startswith("#")
+                )
+                for status in self.run(run_job, numbered, workers=workers):
+                    total += 1
+                    failed += status != 0
+        finally:
+            self.__batching = False
+
+        if failed:
+            self.error("%d of %d batch jobs failed", failed, total)
+            return 1
+        self.info("%d batch jobs finished", total)
+        return 0
+
+    def __run_job(
+        self, entry: Callable, parser: "CompiledParser", base: list[str], job: tuple[int, str]
+    ) -> int:
+        import shlex
+
+        number, line = job
+        self.__job.number = number
+        try:
+            args = parser.parse(base + shlex.split(line))
+            status = entry(args)
+            return status if isinstance(status, int) else 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            self.error(str(e.code))
+            return 1
+        except HelpRequested:
+            self.error("-h/--help isn't supported in batch jobs")
+            return 2
+        except ArgumentError as e:
+            for message in e.errors:
+                self.error(message)
+            return 2
+        except Exception as e:
+            self.error(f"{type(e).__name__}: {e}")
+            return 1
+        finally:
+            self.__job.number = None
+
+    async def gather_bounded(
+        self,
+        coro_fn: Callable,
+        targets: Iterable | AsyncIterable,
+        concurrency: int = 1000,
+        collect: bool = True,
+    ) -> list | None:
+        """
+        Awaits coro_fn(target) for every target with at most `concurrency` coroutines in flight.
+
+        Targets are pulled lazily (sync or async iterables both work), so a task is only created
+        once a slot is free. While it runs, success/error/warning/info calls are handed off to a
+        writer thread instead of blocking the event loop on terminal writes.
+
+        Parameters:
+        coro_fn (Callable): Coroutine function called as coro_fn(target).
+        targets (Iterable | AsyncIterable): Targets to process, consumed lazily.
+        concurrency (int): Maximum number of coroutines running at once. Default is 1000.
+        collect (bool): Whether to keep the results. Turn off for huge target lists
+                        where results are only logged. Default is True.
+
+        Returns:
+        list | None: Results in the same order as targets, or None if collect is False.
+        """
+        import asyncio
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        results = []
+        tasks = set()
+        failure = None
+        metrics = self.__metrics
+
+        async def worker(index: int, target) -> None:
+            nonlocal failure
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await coro_fn(target)
+                failed = False
+                if collect:
+                    results[index] = result
+            except Exception as e:
+                if failure is None:
+                    failure = e
+            finally:
+                if metrics is not None:
+                    metrics.finish(time.perf_counter() - start, failed)
+                semaphore.release()
+
+        started = time.perf_counter()
+        self.__start_async_logging()
+        try:
+            index = 0
+            async for target in _aiter(targets):
+                await semaphore.acquire()
+                if failure is not None:
+                    semaphore.release()
+                    break
+                if collect:
+                    results.append(None)
+                if metrics is not None:
+                    metrics.submit()
+                task = asyncio.create_task(worker(index, target))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                index += 1
+
+            if failure is not None:
+                for task in tasks:
+                    task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            await self.__stop_async_logging()
+            if _phases is not None:
+                _phases.add("runner", time.perf_counter() - started)
+
+        if failure is not None:
+            raise failure
+        return results if collect else None
+
+    def __start_async_logging(self) -> None:
+        # the background writer already keeps terminal writes off the calling thread
+        if self.__async_depth == 0 and not isinstance(self.__sink, _BackgroundSink):
+            from concurrent.futures import ThreadPoolExecutor
+
+            self.__log_executor = ThreadPoolExecutor(max_workers=1)
+        self.__async_depth += 1
+
+    async def __stop_async_logging(self) -> None:
+        import asyncio
+
+        self.__async_depth -= 1
+        if self.__async_depth == 0 and self.__log_executor is not None:
+            executor = self.__log_executor
+            self.__log_executor = None
+            # wait for queued lines without blocking the loop
+            await asyncio.wrap_future(executor.submit(sys.stdout.flush))
+            executor.shutdown(wait=False)
 
     #
     def get_types(self):
         """
         Display supported types by arg_type argument
         """
-        print("""
-int -> integer (e.g., 123)
-float -> floating point number (e.g., 12.34)
-string -> a string of text
-url -> a valid URL (e.g., https://example.com)
-ip -> a valid IP address (e.g., 192.168.1.1)
-port -> a valid port number (1-65535)
-file -> a valid file path (e.g., /path/to/file)
-dir -> a valid directory path (e.g., /path/to/directory)
-email -> a valid email address (e.g., user@example.com)""")
+        print(
+            "\n"
+            + "\n".join(f"{name} -> {spec.description}" for name, spec in _TYPES.items())
+        )
 
     def get_themes(self):
         """
@@ -556,75 +1545,7 @@ THEMES:
         Parameters:
         theme (str): style of the output
         """
-        themes = {
-            "default": {
-                "success": ("✔", "\033[92m"),
-                "error": ("✖", "\033[5;91m"),
-                "warning": ("!", "\033[93m"),
-                "info": ("*", "\033[96m"),
-            },
-            "anon": {
-                "success": ("□", "\033[97m"),
-                "error": ("■", "\033[91m"),
-                "warning": ("▲", "\033[93m"),
-                "info": ("○", "\033[90m"),
-            },
-            "hack": {
-                "success": ("++", "\033[92m"),
-                "error": ("--", "\033[91m"),
-                "warning": ("##", "\033[93m"),
-                "info": ("@@", "\033[94m"),
-            },
-            "cyber": {
-                "success": ("**", "\033[96m"),
-                "error": ("XX", "\033[91m"),
-                "warning": ("!!", "\033[33m"),
-                "info": ("##", "\033[34m"),
-            },
-            "ghost": {
-                "success": ("~~", "\033[97m"),
-                "error": ("XX", "\033[91m"),
-                "warning": ("^^", "\033[35m"),
-                "info": ("__", "\033[90m"),
-            },
-            "virus": {
-                "success": ("++", "\033[92m"),
-                "error": ("**", "\033[91m"),
-                "warning": ("!!", "\033[93m"),
-                "info": ("##", "\033[96m"),
-            },
-            "pwn": {
-                "success": ("^_^", "\033[35m"),
-                "error": ("X_X", "\033[91m"),
-                "warning": ("#_#", "\033[93m"),
-                "info": ("*_*", "\033[97m"),
-            },
-            "stealth": {
-                "success": ("~~~", "\033[90m"),
-                "error": ("***", "\033[91m"),
-                "warning": ("---", "\033[90m"),
-                "info": ("+++", "\033[94m"),
-            },
-            "binary": {
-                "success": ("00", "\033[92m"),
-                "error": ("01", "\033[91m"),
-                "warning": ("!!", "\033[93m"),
-                "info": ("??", "\033[96m"),
-            },
-            "glitch": {
-                "success": ("%%%", "\033[96m"),
-                "error": ("&&&", "\033[95m"),
-                "warning": ("###", "\033[93m"),
-                "info": ("@@@", "\033[94m"),
-            },
-            "root": {
-                "success": ("$", "\033[93m"),
-                "error": ("!", "\033[91m"),
-                "warning": ("#", "\033[33m"),
-                "info": ("&", "\033[97m"),
-            },
-        }
-
+        themes = _themes()
         if theme in themes:
             self.__set_theme(
                 success=themes[theme]["success"],
@@ -651,3 +1572,1109 @@ THEMES:
         self.__err_sym, self.__error = error
         self.__warn_sym, self.__warning = warning
         self.__info_sym, self.__info = info
+        self.__build_prefixes()
+
+
+# options handled by Nyx itself -> whether they need a value (FILE or =FILE),
+# the others take an optional =FILE only
+_RESERVED = {
+    "--nyx-batch": True,
+    "--nyx-profile": False,
+    "--nyx-memprofile": False,
+    "--nyx-resume": False,
+}
+
+
+def _split_reserved(argv: list[str]) -> tuple[list[str], dict[str, str]]:
+    """
+    Removes the reserved --nyx-* options from argv.
+
+    Returns the rest of argv and the value of every reserved option found, keyed by its name
+    without the --nyx- prefix ("" for a flag without =FILE).
+    """
+    rest = []
+    options = {}
+    index = 0
+    while index < len(argv):
+        token = argv[index]
+        index += 1
+        if token == "--":
+            rest.extend(argv[index - 1 :])
+            break
+        name, has_value, value = token.partition("=")
+        needs_value = _RESERVED.get(name)
+        if needs_value is None or (needs_value and not has_value and index >= len(argv)):
+            rest.append(token)
+            continue
+        if needs_value and not has_value:
+            value = argv[index]
+            index += 1
+        options[name[6:]] = value
+    return rest, options
+
+
+def _start_profiling(reserved: dict[str, str]) -> None:
+    """Starts the profilers asked for with --nyx-profile/--nyx-memprofile, once per process."""
+    global _phases
+    cpu = reserved.get("profile")
+    memory = reserved.get("memprofile")
+    if _phases is not None or (cpu is None and memory is None):
+        return
+    from .profiling import Profiler
+
+    profiler = Profiler(cpu, memory)
+    _phases = profiler.phases
+    atexit.register(profiler.stop)
+    profiler.start()
+
+
+async def _aiter(targets):
+    if isinstance(targets, AsyncIterable):
+        async for target in targets:
+            yield target
+    else:
+        for target in targets:
+            yield target
+
+
+class _BufferedSink:
+    """
+    Holds log lines and writes them with a single write() call per batch.
+
+    With a flush_interval the first line of a batch starts a timer, so a line is written at
+    most flush_interval seconds later even if the tool goes quiet after logging it.
+    """
+
+    def __init__(
+        self,
+        stream,
+        flush_lines: int,
+        flush_bytes: int,
+        flush_interval: float | None,
+    ) -> None:
+        self.__stream = stream
+        self.__flush_lines = max(flush_lines, 1)
+        self.__flush_bytes = flush_bytes
+        self.__flush_interval = flush_interval
+        self.__lines = []
+        self.__size = 0
+        self.__timer = None
+        import threading
+
+        # workers from run() log concurrently
+        self.__lock = threading.Lock()
+
+    def write(self, line: str, flush: bool = False) -> None:
+        with self.__lock:
+            if not self.__lines and self.__flush_interval is not None and not flush:
+                import threading
+
+                self.__timer = threading.Timer(self.__flush_interval, self.__flush_due)
+                self.__timer.daemon = True
+                self.__timer.start()
+            self.__lines.append(line)
+            self.__size += len(line) + 1
+            if (
+                flush
+                or len(self.__lines) >= self.__flush_lines
+                or self.__size >= self.__flush_bytes
+            ):
+                self.__flush()
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__flush()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __flush_due(self) -> None:
+        with self.__lock:
+            self.__timer = None
+            self.__flush()
+
+    def __flush(self) -> None:
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if not self.__lines:
+            return
+        stream = self.__stream if self.__stream is not None else sys.stdout
+        self.__lines.append("")
+        stream.write("\n".join(self.__lines))
+        stream.flush()
+        self.__lines = []
+        self.__size = 0
+
+
+class _BackgroundSink:
+    """Queues log lines for a single daemon thread that writes them in batches."""
+
+    def __init__(self, stream, max_batch: int) -> None:
+        import queue
+        import threading
+
+        self.__stream = stream
+        self.__max_batch = max(max_batch, 1)
+        self.__queue = queue.SimpleQueue()
+        self.__thread = threading.Thread(
+            target=self.__run, name="nyx-log-writer", daemon=True
+        )
+        self.__thread.start()
+
+    def write(self, line: str, flush: bool = False) -> None:
+        # every batch is flushed by the writer anyway, waiting here would block the caller
+        self.__queue.put(line)
+
+    def flush(self) -> None:
+        if not self.__thread.is_alive():
+            return
+        import threading
+
+        done = threading.Event()
+        self.__queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        if self.__thread.is_alive():
+            self.__queue.put(None)
+            self.__thread.join()
+
+    def __run(self) -> None:
+        import queue
+        import threading
+
+        get = self.__queue.get
+        get_nowait = self.__queue.get_nowait
+        while True:
+            item = get()
+            lines = []
+            waiting = []
+            stop = False
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiting.append(item)
+                else:
+                    lines.append(item)
+                    if len(lines) >= self.__max_batch:
+                        break
+                try:
+                    item = get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                if lines:
+                    stream = self.__stream if self.__stream is not None else sys.stdout
+                    lines.append("")
+                    stream.write("\n".join(lines))
+                    stream.flush()
+            except (OSError, ValueError):
+                # stream is gone (closed pipe/file), nowhere left to report it
+                pass
+            finally:
+                for event in waiting:
+                    event.set()
+            if stop:
+                return
+
+
+class _FloodGuard:
+    """
+    Repeat collapsing and per-level token buckets in front of the log writers.
+
+    Recent messages live in a dict keyed by (level, text, fields) in insertion order, so
+    forgetting the oldest one when it's full is O(1) and memory stays bounded.
+    """
+
+    def __init__(self) -> None:
+        import threading
+
+        # log calls come from every worker thread
+        self.__lock = threading.Lock()
+        self.__window = None
+        self.__max_tracked = 1024
+        # key -> [window end, copies hidden, level, log, color_text, fields]
+        self.__recent = {}
+        # forgotten entries that still have hidden copies to report
+        self.__evicted = []
+        # level -> [tokens, per second, burst, last refill]
+        self.__buckets = {}
+        self.__dropped = dict.fromkeys(_LEVELS, 0)
+
+    @property
+    def evicted(self) -> bool:
+        return bool(self.__evicted)
+
+    def configure_repeats(self, window: float | None, max_tracked: int) -> None:
+        with self.__lock:
+            self.__window = window
+            self.__max_tracked = max_tracked
+            self.__recent.clear()
+
+    def configure_bucket(self, level: str, per_second: float | None, burst: int | None) -> None:
+        with self.__lock:
+            if per_second is None:
+                self.__buckets.pop(level, None)
+            else:
+                self.__buckets[level] = [float(burst), per_second, burst, time.monotonic()]
+
+    def allow(self, level: str) -> bool:
+        bucket = self.__buckets.get(level)
+        if bucket is None:
+            return True
+        now = time.monotonic()
+        with self.__lock:
+            tokens = min(bucket[0] + (now - bucket[3]) * bucket[1], bucket[2])
+            bucket[3] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                self.__dropped[level] += 1
+                return False
+            bucket[0] = tokens - 1
+            return True
+
+    def repeat(self, level: str, log: str, color_text, fields: dict) -> int | None:
+        """
+        Returns None if the message has to be hidden, otherwise how many copies of it were
+        hidden before (0 for a new message).
+        """
+        window = self.__window
+        if window is None:
+            return 0
+        key = (level, log, repr(fields)) if fields else (level, log)
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__recent.get(key)
+            if entry is not None and now < entry[0]:
+                entry[1] += 1
+                return None
+            hidden = 0
+            if entry is not None:
+                hidden = entry[1]
+                # moved to the end, it's the most recent one again
+                del self.__recent[key]
+            elif len(self.__recent) >= self.__max_tracked:
+                oldest = next(iter(self.__recent))
+                forgotten = self.__recent.pop(oldest)
+                if forgotten[1]:
+                    self.__evicted.append((*forgotten[2:], forgotten[1]))
+            self.__recent[key] = [now + window, 0, level, log, color_text, fields]
+            return hidden
+
+    def take_repeats(self, evicted_only: bool = False) -> list[tuple]:
+        """(level, log, color_text, fields, hidden copies) of the messages with hidden copies."""
+        with self.__lock:
+            repeats = self.__evicted
+            self.__evicted = []
+            if not evicted_only:
+                for entry in self.__recent.values():
+                    if entry[1]:
+                        repeats.append((*entry[2:], entry[1]))
+                        entry[1] = 0
+            return repeats
+
+    def dropped(self) -> dict[str, int]:
+        with self.__lock:
+            return {level: count for level, count in self.__dropped.items() if count}
+
+
+class _Progress:
+    """
+    completed/total, rate and ETA of a run() on stderr.
+
+    advance() is called for every finished item but only looks at the clock, the line is
+    rendered at most once per interval, so the cost stays flat however fast items finish.
+    On a terminal the line is redrawn in place and pause() takes it off the screen before a
+    log line is written. It stays off until the next throttled redraw, so a tool logging
+    every item costs one clear per redraw, not a clear and a redraw per log line.
+    Elsewhere a plain summary line is printed every interval.
+    """
+
+    def __init__(
+        self,
+        total: int | None,
+        stream=None,
+        live: bool = True,
+        hz: float = 10.0,
+        summary_interval: float = 10.0,
+    ) -> None:
+        import threading
+
+        self.__stream = stream if stream is not None else sys.stderr
+        self.__total = total
+        isatty = getattr(self.__stream, "isatty", None)
+        self.__live = live and isatty is not None and isatty()
+        self.__interval = 1 / hz if self.__live else summary_interval
+        # draws from the consumer and log lines from worker threads
+        self.__lock = threading.Lock()
+        self.count = 0
+        now = time.monotonic()
+        self.__started = now
+        self.__next_draw = now + self.__interval
+        self.__last_time = now
+        self.__last_count = 0
+        self.__rate = None
+        self.__text = ""
+        # the live line is on the screen, pause() has to clear it
+        self.__shown = False
+
+    def skip(self, count: int = 1) -> None:
+        """Takes targets finished by an earlier run out of the total."""
+        if self.__total is not None:
+            self.__total = max(self.__total - count, 0)
+
+    def track(self, results: Iterable) -> Iterator:
+        for result in results:
+            self.advance()
+            yield result
+
+    def advance(self, count: int = 1) -> None:
+        self.count += count
+        now = time.monotonic()
+        if now >= self.__next_draw:
+            self.__next_draw = now + self.__interval
+            with self.__lock:
+                self.__text = self.__render(now)
+                self.__show()
+
+    def pause(self) -> None:
+        if self.__live:
+            self.__lock.acquire()
+            try:
+                if self.__shown:
+                    self.__shown = False
+                    self.__stream.write("\r\033[K")
+                    self.__stream.flush()
+            except BaseException:
+                self.__lock.release()
+                raise
+
+    def resume(self) -> None:
+        if self.__live:
+            try:
+                # back on screen only when a redraw is due anyway, e.g. no item finished since
+                now = time.monotonic()
+                if now >= self.__next_draw:
+                    self.__next_draw = now + self.__interval
+                    self.__text = self.__render(now)
+                    self.__show()
+            finally:
+                self.__lock.release()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__text = self.__render(time.monotonic(), final=True)
+            self.__show()
+            if self.__live:
+                self.__stream.write("\n")
+                self.__stream.flush()
+
+    def __show(self) -> None:
+        if not self.__text:
+            return
+        if self.__live:
+            self.__stream.write("\r\033[K" + self.__text)
+            self.__shown = True
+        else:
+            self.__stream.write(f"[progress] {self.__text}\n")
+        self.__stream.flush()
+
+    def __render(self, now: float, final: bool = False) -> str:
+        count = self.count
+        elapsed = now - self.__last_time
+        if elapsed > 0:
+            instant = (count - self.__last_count) / elapsed
+            # smoothed so the ETA doesn't jump around with every redraw
+            self.__rate = instant if self.__rate is None else 0.3 * instant + 0.7 * self.__rate
+        self.__last_time = now
+        self.__last_count = count
+        rate = self.__rate or 0.0
+        if final and now > self.__started:
+            rate = count / (now - self.__started)
+
+        total = self.__total
+        if total:
+            parts = [f"{count:,}/{total:,} ({min(count / total, 1.0):.1%})"]
+        else:
+            parts = [f"{count:,} done"]
+        parts.append(f"{rate:,.0f}/s")
+        if total and not final and rate > 0 and count < total:
+            seconds = int((total - count) / rate)
+            parts.append(f"ETA {seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}")
+        return " | ".join(parts)
+
+
+class _ArgType:
+    """One entry of the arg_type registry."""
+
+    __slots__ = ("blocking", "cache", "convert", "description", "error", "value_type")
+
+    def __init__(
+        self,
+        convert: Callable,
+        description: str,
+        error: str,
+        value_type: type | str,
+        cache: str | None = None,
+        blocking: bool = False,
+    ) -> None:
+        self.convert = convert
+        self.description = description
+        self.error = error
+        self.value_type = value_type
+        # None: always convert, "value": reuse results, "fs": reuse them until the ttl runs out
+        self.cache = cache
+        # waits on the filesystem/network, parse() checks these concurrently
+        self.blocking = blocking
+
+
+def _type_spec(arg_type: str | None) -> "_ArgType | None":
+    spec = _TYPES.get(arg_type)
+    if spec is None and arg_type is not None and arg_type.startswith("lines:"):
+        # "lines:ip" etc. is built from the item type on first use and kept in the registry
+        item = _TYPES.get(arg_type[6:])
+        if item is not None:
+            spec = _TYPES[arg_type] = _ArgType(
+                partial(_to_lines, convert=item.convert),
+                f"a text file with one value per line, each {item.description}",
+                _TYPES["lines"].error,
+                "LineFile",
+                blocking=True,
+            )
+    return spec
+
+
+def _convert(arg_name: str, arg_type: str | None, value: str):
+    """Validates value and returns it converted to its arg_type. Unknown types pass through."""
+    spec = _type_spec(arg_type)
+    if spec is None:
+        return value
+    try:
+        if spec.cache is None:
+            return spec.convert(value)
+        return _validation_cache().convert(arg_type, spec, value)
+    except (ValueError, TypeError, LookupError):
+        raise ArgumentError(spec.error.format(name=arg_name, value=value)) from None
+
+
+class _ValidationCache:
+    """Thread-safe LRU of converted values keyed by (arg_type, value)."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 2.0) -> None:
+        import threading
+
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__hits = 0
+        self.__misses = 0
+
+    def convert(self, arg_type: str, spec: _ArgType, value: str):
+        key = (arg_type, value)
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and (entry[1] is None or now < entry[1]):
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return entry[0]
+            self.__misses += 1
+
+        # converted outside the lock, a slow stat shouldn't hold up other threads
+        result = spec.convert(value)
+        expires = now + self.__ttl if spec.cache == "fs" else None
+        if self.__maxsize and (expires is None or self.__ttl > 0):
+            with self.__lock:
+                self.__entries[key] = (result, expires)
+                self.__entries.move_to_end(key)
+                while len(self.__entries) > self.__maxsize:
+                    self.__entries.popitem(last=False)
+        return result
+
+    def configure(self, maxsize: int, ttl: float) -> None:
+        with self.__lock:
+            self.__maxsize = maxsize
+            self.__ttl = ttl
+            self.__entries.clear()
+            self.__hits = self.__misses = 0
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def info(self) -> dict:
+        with self.__lock:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+                "maxsize": self.__maxsize,
+            }
+
+
+@cache
+def _validation_cache() -> _ValidationCache:
+    # made on first use, the lock would otherwise import threading at startup
+    return _ValidationCache()
+
+
+@cache
+def _validation_pool():
+    """Small thread pool shared by all parsers for checking blocking types concurrently."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="nyx-validate")
+
+
+@cache
+def _url_re():
+    import re
+
+    return re.compile(
+        r"^(?:http|ftp)s?://"  # http:// or https://
+        r"(?:(?:[A-Z0-9](?:[A-Z0-9-]*[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]*[A-Z0-9-]{2,}\.?)|"  # domain...
+        r"localhost|"  # localhost...
+        r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|"  # ...or ipv4
+        r"\[?[A-F0-9]*:[A-F0-9:]+\]?)"  # or ipv6
+        r"(?::\d+)?"  # optional port
+        r"(?:/?|[/?]\S+)$",
+        re.IGNORECASE,
+    )
+
+
+@cache
+def _email_re():
+    import re
+
+    return re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+
+def _check(valid: bool, value: str) -> str:
+    if not valid:
+        raise ValueError(value)
+    return value
+
+
+def _to_str(value: str) -> str:
+    """Non-empty string."""
+    return _check(isinstance(value, str) and len(value) > 0, value)
+
+
+def _to_url(url: str) -> str:
+    """Validate URL with simple regex."""
+    return _check(_url_re().match(url) is not None, url)
+
+
+def _to_ip(ip: str) -> str:
+    """Validate if the input is valid IP address."""
+    import socket
+
+    try:
+        socket.inet_pton(socket.AF_INET, ip)
+    except OSError:
+        try:
+            socket.inet_pton(socket.AF_INET6, ip)
+        except OSError:
+            raise ValueError(ip) from None
+    return ip
+
+
+def _to_port(port: str) -> int:
+    """Ensure the port is within the valid range (1-65535)."""
+    port_num = int(port)
+    _check(1 <= port_num <= 65535, port)
+    return port_num
+
+
+def _to_file(path: str) -> str:
+    return _check(os.path.isfile(path), path)
+
+
+def _to_dir(path: str) -> str:
+    return _check(os.path.isdir(path), path)
+
+
+def _to_email(email: str) -> str:
+    """Simple regex to check if email format is valid."""
+    return _check(_email_re().match(email) is not None, email)
+
+
+def _to_lines(path: str, convert: Callable | None = None) -> "LineFile":
+    from .lines import LineFile
+
+    _check(os.path.isfile(path), path)
+    try:
+        return LineFile(path, convert=convert)
+    except OSError:
+        raise ValueError(path) from None
+
+
+def _to_ports(expression: str) -> "PortSet":
+    from .ports import PortSet
+
+    return PortSet.parse(expression)
+
+
+def _to_cidr(expression: str) -> "IPRangeSet":
+    from .ranges import IPRangeSet
+
+    return IPRangeSet.parse(expression)
+
+
+# arg_type -> converter, looked up once per value. Nyx.register_type adds to it.
+_TYPES = {
+    "int": _ArgType(
+        int, "integer (e.g., 123)", "Invalid integer value for '{name}': {value}", int
+    ),
+    "float": _ArgType(
+        float,
+        "floating point number (e.g., 12.34)",
+        "Invalid float value for '{name}': {value}",
+        float,
+    ),
+    "str": _ArgType(
+        _to_str, "a string of text", "Invalid string value for '{name}': {value}", str
+    ),
+    "url": _ArgType(
+        _to_url,
+        "a valid URL (e.g., https://example.com)",
+        "Invalid URL provided for '{name}': {value}",
+        str,
+        "value",
+    ),
+    "ip": _ArgType(
+        _to_ip,
+        "a valid IP address (e.g., 192.168.1.1)",
+        "Invalid IP address for '{name}': {value}",
+        str,
+        "value",
+    ),
+    "port": _ArgType(
+        _to_port,
+        "a valid port number (1-65535)",
+        "Invalid port for '{name}': {value}",
+        int,
+    ),
+    "file": _ArgType(
+        _to_file,
+        "a valid file path (e.g., /path/to/file)",
+        "File does not exist or cannot be read: {value}",
+        str,
+        "fs",
+        blocking=True,
+    ),
+    "dir": _ArgType(
+        _to_dir,
+        "a valid directory path (e.g., /path/to/directory)",
+        "Directory does not exist: {value}",
+        str,
+        "fs",
+        blocking=True,
+    ),
+    "email": _ArgType(
+        _to_email,
+        "a valid email address (e.g., user@example.com)",
+        "Invalid email address for '{name}': {value}",
+        str,
+        "value",
+    ),
+    # every parse gets its own mapping of the file, so lines values are never cached
+    "lines": _ArgType(
+        _to_lines,
+        "a text file read lazily line by line (e.g., wordlist.txt), lines:<type> validates every line",
+        "File does not exist or cannot be read: {value}",
+        "LineFile",
+        blocking=True,
+    ),
+    "ports": _ArgType(
+        _to_ports,
+        "ports, ranges, top20/top100/all, !exclusions (e.g., 1-1024,3306,!22)",
+        "Invalid port list for '{name}': {value}",
+        "PortSet",
+        "value",
+    ),
+    "cidr": _ArgType(
+        _to_cidr,
+        "IP ranges: CIDRs, addresses, a-b ranges, !exclusions (e.g., 10.0.0.0/8,!10.1.0.0/16)",
+        "Invalid IP range for '{name}': {value}",
+        "IPRangeSet",
+        "value",
+    ),
+    # flags never get a value to convert, the entry is here for get_types() and annotations
+    "flag": _ArgType(
+        bool, "a switch that never takes a value (e.g., --verbose)", "", bool
+    ),
+}
+# same converter and cache entries under the name people reach for first
+_TYPES["iprange"] = _TYPES["cidr"]
+
+
+class CompiledParser:
+    """
+    Frozen copy of a Nyx argument spec, made by Nyx.compile().
+
+    parse() only reads the spec and keeps all state in locals, so one parser can be shared
+    between threads and reused for any number of argv lists. Errors are raised, never printed.
+    """
+
+    def __init__(self, arguments: dict, short_to_long: dict, help_text: str) -> None:
+        self.__types = MappingProxyType(
+            {name: details["type"] for name, details in arguments.items()}
+        )
+        self.__required = tuple(
+            name for name, details in arguments.items() if details["required"]
+        )
+        self.__shorts = MappingProxyType(dict(short_to_long))
+        self.help_text = help_text
+        self.result_class = _result_class(self.__types)
+
+    def parse(self, argv: list[str]) -> "ParseResult":
+        """
+        Parses one argv list (without the program name).
+
+        Parameters:
+        argv (list[str]): Arguments to parse.
+
+        Returns:
+        ParseResult: Parsed values, an instance of result_class.
+
+        Raises:
+        HelpRequested: -h or --help was passed.
+        ArgumentError: Values are invalid or missing, or required arguments weren't given.
+                       Its errors attribute lists every problem, not just the first one.
+        """
+        phases = _phases
+        if phases is not None:
+            started = time.perf_counter()
+        types = self.__types
+        values = {}
+        errors = []
+        positionals = []
+        index = 0
+        count = len(argv)
+
+        while index < count:
+            token = argv[index]
+            index += 1
+
+            if token == "--":
+                positionals.extend(argv[index:])
+                break
+            if token in ("--help", "-h"):
+                raise HelpRequested(self.help_text)
+
+            if token.startswith("--"):
+                name, has_value, value = token[2:].partition("=")
+                if name not in types:
+                    # unknown options are ignored
+                    continue
+                if has_value:
+                    if types[name] == "flag":
+                        # bool("false") would be True
+                        errors.append(f"'--{name}' doesn't take a value")
+                    else:
+                        self.__assign(values, name, value)
+                    continue
+                names = (name,)
+            elif len(token) > 1 and token[0] == "-" and not _is_number(token):
+                names, value = self.__expand_shorts(token, errors)
+                if value is not None:
+                    self.__assign(values, names[0], value)
+                    continue
+            else:
+                positionals.append(token)
+                continue
+
+            for name in names[:-1]:
+                self.__assign_flag(values, errors, name)
+            if names:
+                # only the last flag of a group can take the next token as its value
+                name = names[-1]
+                if index < count and self.__takes_value(name, argv[index]):
+                    self.__assign(values, name, argv[index])
+                    index += 1
+                else:
+                    self.__assign_flag(values, errors, name)
+
+        if phases is not None:
+            tokenized = time.perf_counter()
+            phases.add("parse", tokenized - started)
+        errors.extend(self.__validate(values))
+        if phases is not None:
+            phases.add("validate", time.perf_counter() - tokenized)
+        missing_args = [name for name in self.__required if name not in values]
+        if missing_args:
+            errors.append(
+                f"The following required arguments are missing: {', '.join(missing_args)}"
+            )
+        if errors:
+            raise ArgumentError(*errors)
+
+        result = self.result_class.__new__(self.result_class)
+        for name, field in result._fields.items():
+            setattr(result, field, values.get(name))
+        result.positionals = positionals
+        result.provided = tuple(values)
+        return result
+
+    def __expand_shorts(self, token: str, errors: list) -> tuple[tuple[str, ...], str | None]:
+        """Splits -x, -abc (grouped flags) and -p80 (attached value) into long names."""
+        shorts = self.__shorts
+        body = token[1:]
+        if body in shorts:
+            return (shorts[body],), None
+        if body[0] not in shorts:
+            # unknown options are ignored, like unknown long ones
+            return (), None
+        if all(char in shorts for char in body):
+            return tuple(shorts[char] for char in body), None
+        name = shorts[body[0]]
+        if self.__types[name] == "flag":
+            rest = body[1:]
+            if rest[0] in shorts or len(rest) == 1:
+                # a group of flags with a letter that isn't one
+                unknown = next(char for char in rest if char not in shorts)
+                errors.append(f"Unknown option '-{unknown}' in '{token}'")
+            else:
+                errors.append(f"'-{body[0]}' doesn't take a value")
+            return (), None
+        return (name,), body[1:]
+
+    def __takes_value(self, name: str, token: str) -> bool:
+        if self.__types[name] == "flag":
+            return False
+        if not token.startswith("-") or token == "-":
+            return True
+        return _is_number(token) and token[1:] not in self.__shorts
+
+    def __assign(self, values: dict, name: str, value: str) -> None:
+        # raw string for now, __validate converts it once the whole argv is read
+        values[name] = value
+
+    def __assign_flag(self, values: dict, errors: list, name: str) -> None:
+        if name in self.__required:
+            errors.append(f"Argument '--{name}' requires a value but none was provided.")
+            # reported already, None keeps it out of the missing list
+            values[name] = None
+            return
+        values[name] = True
+
+    def __validate(self, values: dict) -> list[str]:
+        """Converts the raw values in place and returns the error of every invalid one."""
+        types = self.__types
+        names = [name for name, value in values.items() if isinstance(value, str)]
+        blocking = [
+            name
+            for name in names
+            if (spec := _type_spec(types[name])) is not None and spec.blocking
+        ]
+        futures = {}
+        if len(blocking) > 1:
+            # stat()/open() calls overlap instead of adding up on slow (network) filesystems
+            pool = _validation_pool()
+            futures = {
+                name: pool.submit(_convert, name, types[name], values[name])
+                for name in blocking
+            }
+
+        errors = []
+        for name in names:
+            future = futures.get(name)
+            try:
+                if future is not None:
+                    values[name] = future.result()
+                else:
+                    values[name] = _convert(name, types[name], values[name])
+            except ArgumentError as e:
+                errors.append(str(e))
+        return errors
+
+
+class ParseResult:
+    """
+    Base of the result classes CompiledParser generates from the argument spec.
+
+    Every argument gets its own __slots__ field (dashes become underscores, so --dry-run is
+    result.dry_run), which makes reads plain attribute lookups with no per-instance __dict__.
+    The original names still work through getattr(result, "dry-run").
+    """
+
+    __slots__ = ("positionals", "provided")
+    # argument name -> slot name, filled in on generated classes
+    _fields = {}
+
+    def __getattr__(self, name: str):
+        field = self._fields.get(name)
+        if field is not None and field != name:
+            return getattr(self, field)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def as_dict(self) -> dict:
+        """Returns every argument name mapped to its value (None if not given)."""
+        return {name: getattr(self, field) for name, field in self._fields.items()}
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self._fields.values())
+        return f"{type(self).__name__}({values})"
+
+
+def _result_class(types: Mapping[str, str | None]) -> type:
+    """Generates a ParseResult subclass with one slot per argument."""
+    reserved = set(dir(ParseResult))
+    fields = {}
+    annotations = {}
+    for name, arg_type in types.items():
+        field = name.replace("-", "_")
+        if not field.isidentifier() or keyword.iskeyword(field):
+            field = "_" + "".join(char if char.isalnum() else "_" for char in field)
+        while field in reserved or field in annotations:
+            field += "_"
+        fields[name] = field
+        spec = _type_spec(arg_type)
+        value_type = spec.value_type if spec is not None else str
+        # types from modules that aren't imported yet are annotated by name
+        annotations[field] = (
+            f"{value_type} | None" if isinstance(value_type, str) else value_type | None
+        )
+
+    return type(
+        "Args",
+        (ParseResult,),
+        {
+            "__slots__": tuple(annotations),
+            "__annotations__": annotations,
+            "_fields": MappingProxyType(fields),
+        },
+    )
+
+
+def _is_number(token: str) -> bool:
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+def _bounded_map(executor, func: Callable, units: Iterable, max_pending: int, ordered: bool):
+    """Submits func(unit) for every unit with at most max_pending unfinished at once."""
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pending = {}
+    finished = {}
+    next_index = 0
+
+    def collect(done):
+        nonlocal next_index
+        for future in done:
+            index = pending.pop(future)
+            if ordered:
+                finished[index] = future
+            else:
+                yield future.result()
+        while next_index in finished:
+            yield finished.pop(next_index).result()
+            next_index += 1
+
+    try:
+        for index, unit in enumerate(units):
+            pending[executor.submit(func, unit)] = index
+            # results held back for ordering count too, otherwise one slow task lets them pile up
+            while len(pending) + len(finished) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+    finally:
+        # stopped early (break, exception) so drop whatever didn't start yet
+        for future in pending:
+            future.cancel()
+
+
+def _measured(metrics, func: Callable, target):
+    start = time.perf_counter()
+    try:
+        result = func(target)
+    except BaseException:
+        metrics.finish(time.perf_counter() - start, failed=True)
+        raise
+    metrics.finish(time.perf_counter() - start)
+    return result
+
+
+def _pending(checkpoint, targets: Iterable, key: Callable | None, status) -> Iterator[tuple]:
+    """Pairs targets with their checkpoint key, leaving out the ones finished in an earlier run."""
+    for index, target in enumerate(targets):
+        target_key = index if key is None else key(target)
+        if checkpoint.done(target_key):
+            if status is not None:
+                status.skip()
+            continue
+        yield target_key, target
+
+
+def _keyed(func: Callable, item: tuple) -> tuple:
+    target_key, target = item
+    return target_key, func(target)
+
+
+def _checkpointed(checkpoint, results: Iterable[tuple]) -> Iterator:
+    for target_key, result in results:
+        yield result
+        # only once the consumer is done with it, a kill in between runs the target again
+        checkpoint.add(target_key)
+
+
+def _run_chunk(func: Callable, chunk: list) -> tuple[list, float]:
+    start = time.perf_counter()
+    results = [func(target) for target in chunk]
+    return results, time.perf_counter() - start
+
+
+class _Chunker:
+    """
+    Cuts targets into lists for process workers.
+
+    Without a fixed size, every finished chunk reports how long it took and the next chunks
+    are sized so one chunk takes roughly `target_time` seconds. Cheap items end up in big
+    chunks (less IPC per item), expensive ones in small chunks (better load balancing).
+    """
+
+    def __init__(
+        self,
+        targets: Iterable,
+        size: int | None = None,
+        target_time: float = 0.05,
+        max_size: int = 4096,
+    ) -> None:
+        self.__targets = iter(targets)
+        self.__fixed = size is not None
+        self.__target_time = target_time
+        self.__max_size = max_size
+        self.size = max(size or 8, 1)
+
+    def __iter__(self) -> Iterator[list]:
+        while True:
+            chunk = list(islice(self.__targets, self.size))
+            if not chunk:
+                return
+            yield chunk
+
+    def record(self, items: int, elapsed: float) -> None:
+        if self.__fixed or items == 0:
+            return
+        per_item = elapsed / items
+        if per_item > 0:
+            ideal = int(self.__target_time / per_item)
+        else:
+            ideal = self.__max_size
+        ideal = min(max(ideal, 1), self.__max_size)
+        # move halfway towards the ideal size so one noisy chunk doesn't swing it
+        self.size = max((self.size + ideal) // 2, 1)
@@ -0,0 +1,166 @@
+"""Port sets stored as a 65536-bit bitmap, used by the "ports" argument type"""
+
+from collections.abc import Iterable, Iterator
+
+# nmap's most common TCP ports
+_NAMED = {
+    "top20": "21-23,25,53,80,110-111,135,139,143,443,445,993,995,1723,3306,3389,5900,8080",
+    "top100": (
+        "7,9,13,21-23,25-26,37,53,79-81,88,106,110-111,113,119,135,139,143-144,179,199,"
+        "389,427,443-445,465,513-515,543-544,548,554,587,631,646,873,990,993,995,"
+        "1025-1029,1110,1433,1720,1723,1755,1900,2000-2001,2049,2121,2717,3000,3128,"
+        "3306,3389,3986,4899,5000,5009,5051,5060,5101,5190,5357,5432,5631,5666,5800,"
+        "5900,6000-6001,6646,7070,8000,8008-8009,8080-8081,8443,8888,9100,9999-10000,"
+        "32768,49152-49157"
+    ),
+    "all": "1-65535",
+}
+
+
+class PortSet:
+    """
+    Immutable set of TCP/UDP ports kept as one bit per port (8 KiB for any selection).
+
+    Build it from an expression with PortSet.parse("1-1024,3306,top100,!22") or from
+    integers with PortSet([80, 443]). Membership is a single bit test, len() is cached
+    and iteration skips empty bytes, so even full-range scans stay cheap.
+    """
+
+    def __init__(self, ports: Iterable[int] = ()) -> None:
+        """
+        Parameters:
+        ports (Iterable[int]): Port numbers (1-65535).
+        """
+        mask = 0
+        for port in ports:
+            mask |= 1 << _check_port(port)
+        self.__set_mask(mask)
+
+    @classmethod
+    def parse(cls, expression: str) -> "PortSet":
+        """
+        Parses a comma-separated port expression. Items can be single ports (443), ranges
+        (8000-9000, open ends like -1024 and 60000- work too), "-" or "all" for every port and
+        the named sets top20 and top100. Items starting with ! are removed from the result.
+
+        Parameters:
+        expression (str): Port expression.
+
+        Returns:
+        PortSet: The parsed set.
+
+        Raises:
+        ValueError: An item isn't a valid port, range or name.
+        """
+        ports = cls.__new__(cls)
+        ports.__set_mask(_parse_mask(expression))
+        return ports
+
+    def __set_mask(self, mask: int) -> None:
+        self.__bits = mask.to_bytes(8192, "little")
+        self.__count = mask.bit_count()
+
+    def __contains__(self, port) -> bool:
+        return (
+            isinstance(port, int)
+            and 0 < port < 65536
+            and self.__bits[port >> 3] >> (port & 7) & 1 == 1
+        )
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[int]:
+        """Yields ports in ascending order."""
+        for index, byte in enumerate(self.__bits):
+            if byte:
+                base = index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield base | bit
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PortSet) and self.__bits == other.__bits
+
+    def __hash__(self) -> int:
+        return hash(self.__bits)
+
+    def chunks(self, count: int) -> list["PortSet"]:
+        """
+        Splits the set into `count` parts with (almost) the same number of ports.
+
+        Parameters:
+        count (int): Number of chunks.
+
+        Returns:
+        list[PortSet]: Disjoint sets that together hold every port, in ascending order.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        ports = iter(self)
+        chunks = []
+        for i in range(count):
+            size = self.__count * (i + 1) // count - self.__count * i // count
+            chunks.append(PortSet(next(ports) for _ in range(size)))
+        return chunks
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """Returns the ports as sorted, merged (first, last) ranges."""
+        ranges = []
+        for port in self:
+            if ranges and ranges[-1][1] == port - 1:
+                ranges[-1] = (ranges[-1][0], port)
+            else:
+                ranges.append((port, port))
+        return ranges
+
+    def __str__(self) -> str:
+        return ",".join(
+            str(first) if first == last else f"{first}-{last}"
+            for first, last in self.ranges()
+        )
+
+    def __repr__(self) -> str:
+        return f"PortSet('{self}')"
+
+
+def _check_port(port: int) -> int:
+    if not 1 <= port <= 65535:
+        raise ValueError(f"Port out of range (1-65535): {port}")
+    return port
+
+
+def _parse_mask(expression: str) -> int:
+    include = 0
+    exclude = 0
+    for item in expression.split(","):
+        item = item.strip()
+        excluded = item.startswith("!")
+        if excluded:
+            item = item[1:].strip()
+        if not item:
+            continue
+        mask = _parse_item(item)
+        if excluded:
+            exclude |= mask
+        else:
+            include |= mask
+    return include & ~exclude
+
+
+def _parse_item(item: str) -> int:
+    """Returns the bit mask of one expression item."""
+    named = _NAMED.get(item.lower())
+    if named is not None:
+        return _parse_mask(named)
+    if item == "-":
+        first, last = 1, 65535
+    elif "-" in item:
+        left, right = item.split("-", 1)
+        first = _check_port(int(left)) if left.strip() else 1
+        last = _check_port(int(right)) if right.strip() else 65535
+        if last < first:
+            raise ValueError(f"Invalid port range: {item}")
+    else:
+        first = last = _check_port(int(item))
+    return ((1 << (last - first + 1)) - 1) << first
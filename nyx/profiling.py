@@ -0,0 +1,148 @@
+"""CPU and allocation profiling behind the reserved --nyx-profile/--nyx-memprofile flags"""
+
+import cProfile
+import pstats
+import sys
+import threading
+import tracemalloc
+from functools import partial
+
+# lines of the sorted reports
+_TOP = 30
+# one cProfile per thread before 3.12, a single process-wide one (sys.monitoring) after
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+class PhaseTimes:
+    """Wall time and number of calls of Nyx's own phases (parse, validate, log, runner)."""
+
+    def __init__(self) -> None:
+        # log lines are timed from every worker thread
+        self.__lock = threading.Lock()
+        self.__totals = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self.__lock:
+            total = self.__totals.get(phase)
+            if total is None:
+                self.__totals[phase] = [seconds, 1]
+            else:
+                total[0] += seconds
+                total[1] += 1
+
+    def report(self) -> str:
+        with self.__lock:
+            parts = [
+                f"{phase} {seconds * 1000:,.3f} ms in {calls:,} call{'s' if calls != 1 else ''}"
+                for phase, (seconds, calls) in self.__totals.items()
+            ]
+        return "nyx phases (wall time): " + (" | ".join(parts) or "none")
+
+
+class Profiler:
+    """
+    Runs cProfile and/or tracemalloc from start() until stop() (called at exit).
+
+    Before Python 3.12 cProfile only sees the thread that enabled it, so every thread started
+    afterwards (the run() workers) gets a profiler of its own and the results are merged.
+    From 3.12 on cProfile is built on sys.monitoring, which allows one profiler per process
+    but sees every thread, so the main thread's profiler is enough. Process workers aren't
+    profiled.
+    """
+
+    def __init__(self, cpu: str | None, memory: str | None) -> None:
+        """
+        Parameters:
+        cpu (str | None): None to skip CPU profiling, "" for a report on stderr, or a file:
+                          sorted text report if it ends with .txt, otherwise pstats data.
+        memory (str | None): None to skip allocation tracing, "" for a report on stderr,
+                             or a file for the report.
+        """
+        self.cpu = cpu
+        self.memory = memory
+        self.phases = PhaseTimes()
+        self.__profiles = []
+        self.__lock = threading.Lock()
+
+    def start(self) -> None:
+        if self.memory is not None:
+            tracemalloc.start()
+        if self.cpu is not None:
+            profile = cProfile.Profile()
+            self.__profiles.append(profile)
+            if _PER_THREAD:
+                threading.setprofile(self.__profile_thread)
+            profile.enable()
+
+    def stop(self) -> None:
+        if self.cpu is not None:
+            if _PER_THREAD:
+                threading.setprofile(None)
+            self.__profiles[0].disable()
+            stats = self.__cpu_stats()
+            if stats is not None and self.cpu and not self.cpu.endswith(".txt"):
+                stats.dump_stats(self.cpu)
+            elif stats is not None:
+                self.__write(self.cpu, partial(_print_stats, stats))
+        if self.memory is not None:
+            self.__write(self.memory, _print_allocations)
+            tracemalloc.stop()
+        sys.stderr.write(self.phases.report() + "\n")
+        sys.stderr.flush()
+
+    def __profile_thread(self, frame, event, arg) -> None:
+        # first event of a new thread, cProfile takes over its profile hook from here on
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception:
+            # an exception here kills the thread before it runs anything, better unprofiled
+            return
+        with self.__lock:
+            self.__profiles.append(profile)
+
+    def __cpu_stats(self) -> "pstats.Stats | None":
+        """Stats of every profiled thread merged together, None if nothing was recorded."""
+        stats = None
+        with self.__lock:
+            profiles = list(self.__profiles)
+        for profile in profiles:
+            profile.create_stats()
+            # threads that never ran Python code have nothing to merge
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        return stats
+
+    @staticmethod
+    def __write(path: str, report) -> None:
+        if path:
+            with open(path, "w") as f:
+                report(f)
+        else:
+            report(sys.stderr)
+            sys.stderr.flush()
+
+
+def _print_stats(stats: pstats.Stats, stream) -> None:
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(_TOP)
+
+
+def _print_allocations(stream) -> None:
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+    )
+    stream.write(
+        f"traced memory: {current / 1024:,.1f} KiB now, {peak / 1024:,.1f} KiB peak\n"
+        f"top {_TOP} allocation sites:\n"
+    )
+    for stat in snapshot.statistics("lineno")[:_TOP]:
+        stream.write(f"  {stat}\n")
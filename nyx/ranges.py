@@ -0,0 +1,237 @@
+"""Compact sets of IP ranges used by the "cidr"/"iprange" argument types"""
+
+import ipaddress
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterator
+
+
+class IPRangeSet:
+    """
+    Sorted, merged set of IPv4/IPv6 address intervals parsed from an expression like
+    "10.0.0.0/8,!10.1.0.0/16,192.168.1.10-192.168.1.20,fd00::/120".
+
+    Addresses are never materialized: IPv4 intervals live in integer arrays (IPv6 ones in
+    lists, since they need 128 bits), so even 0.0.0.0/0 costs a few bytes. Membership
+    checks, indexing and len() are O(log n) in the number of intervals, iteration is lazy.
+    len() of IPv6 sets bigger than sys.maxsize raises OverflowError like range(), use size.
+    """
+
+    def __init__(
+        self, v4: list[tuple[int, int]] = (), v6: list[tuple[int, int]] = ()
+    ) -> None:
+        """
+        Parameters:
+        v4 (list[tuple[int, int]]): Inclusive (first, last) IPv4 intervals as integers.
+        v6 (list[tuple[int, int]]): Inclusive (first, last) IPv6 intervals as integers.
+        """
+        self.__v4 = _Intervals(_merge(v4), "Q")
+        self.__v6 = _Intervals(_merge(v6), None)
+
+    @classmethod
+    def parse(cls, expression: str) -> "IPRangeSet":
+        """
+        Parses a comma-separated list of CIDRs, single addresses and ranges
+        (10.0.0.1-10.0.0.50 or the short form 10.0.0.1-50). Items starting with ! are excluded.
+
+        Parameters:
+        expression (str): Range expression.
+
+        Returns:
+        IPRangeSet: The parsed set.
+
+        Raises:
+        ValueError: An item isn't a valid address, network or range.
+        """
+        include = {4: [], 6: []}
+        exclude = {4: [], 6: []}
+        for item in expression.split(","):
+            item = item.strip()
+            target = include
+            if item.startswith("!"):
+                item = item[1:].strip()
+                target = exclude
+            if not item:
+                continue
+            version, first, last = _parse_item(item)
+            target[version].append((first, last))
+
+        return cls(
+            _subtract(_merge(include[4]), _merge(exclude[4])),
+            _subtract(_merge(include[6]), _merge(exclude[6])),
+        )
+
+    def __contains__(self, address) -> bool:
+        try:
+            address = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        intervals = self.__v4 if address.version == 4 else self.__v6
+        return intervals.contains(int(address))
+
+    @property
+    def size(self) -> int:
+        """Number of addresses. Unlike len() it also works for IPv6 sets bigger than sys.maxsize."""
+        return self.__v4.total + self.__v6.total
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return bool(self.__v4.total or self.__v6.total)
+
+    def __iter__(self) -> Iterator[str]:
+        """Yields every address as a string, IPv4 first, in ascending order."""
+        for first, last in self.__v4.pairs():
+            for value in range(first, last + 1):
+                yield f"{value >> 24}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+        for first, last in self.__v6.pairs():
+            for value in range(first, last + 1):
+                yield str(ipaddress.IPv6Address(value))
+
+    def __getitem__(self, index: int) -> str:
+        length = self.size
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("address index out of range")
+        if index < self.__v4.total:
+            return str(ipaddress.IPv4Address(self.__v4.at(index)))
+        return str(ipaddress.IPv6Address(self.__v6.at(index - self.__v4.total)))
+
+    def shards(self, count: int) -> list["IPRangeSet"]:
+        """
+        Splits the set into `count` parts with (almost) the same number of addresses.
+
+        Parameters:
+        count (int): Number of shards.
+
+        Returns:
+        list[IPRangeSet]: Disjoint sets that together hold every address, in order.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        total = self.size
+        v4_total = self.__v4.total
+        shards = []
+        for i in range(count):
+            start = total * i // count
+            stop = total * (i + 1) // count
+            shards.append(
+                IPRangeSet(
+                    self.__v4.slice(min(start, v4_total), min(stop, v4_total)),
+                    self.__v6.slice(max(start - v4_total, 0), max(stop - v4_total, 0)),
+                )
+            )
+        return shards
+
+    def ranges(self) -> list[tuple[str, str]]:
+        """Returns the merged intervals as (first, last) address strings."""
+        return [
+            (str(ipaddress.ip_address(first)), str(ipaddress.ip_address(last)))
+            for first, last in self.__v4.pairs()
+        ] + [
+            (str(ipaddress.IPv6Address(first)), str(ipaddress.IPv6Address(last)))
+            for first, last in self.__v6.pairs()
+        ]
+
+    def __repr__(self) -> str:
+        return f"IPRangeSet({self.size} addresses in {len(self.ranges())} ranges)"
+
+
+class _Intervals:
+    """Parallel sequences of interval starts, ends and running address counts."""
+
+    def __init__(self, pairs: list[tuple[int, int]], typecode: str | None) -> None:
+        # typecode None for IPv6, 128-bit values don't fit in an array
+        self.starts = array(typecode) if typecode else []
+        self.ends = array(typecode) if typecode else []
+        # before[i] is the number of addresses in intervals 0..i-1
+        self.before = array(typecode) if typecode else []
+        total = 0
+        for first, last in pairs:
+            self.starts.append(first)
+            self.ends.append(last)
+            self.before.append(total)
+            total += last - first + 1
+        self.total = total
+
+    def pairs(self) -> Iterator[tuple[int, int]]:
+        return zip(self.starts, self.ends)
+
+    def contains(self, value: int) -> bool:
+        i = bisect_right(self.starts, value) - 1
+        return i >= 0 and value <= self.ends[i]
+
+    def at(self, index: int) -> int:
+        i = bisect_right(self.before, index) - 1
+        return self.starts[i] + index - self.before[i]
+
+    def slice(self, start: int, stop: int) -> list[tuple[int, int]]:
+        """Intervals covering the addresses with positions start..stop-1."""
+        pairs = []
+        if start >= stop:
+            return pairs
+        i = bisect_right(self.before, start) - 1
+        while i < len(self.starts) and self.before[i] < stop:
+            first = self.starts[i] + max(start - self.before[i], 0)
+            last = min(self.ends[i], self.starts[i] + stop - 1 - self.before[i])
+            pairs.append((first, last))
+            i += 1
+        return pairs
+
+
+def _parse_item(item: str) -> tuple[int, int, int]:
+    if "/" in item:
+        network = ipaddress.ip_network(item, strict=False)
+        return (
+            network.version,
+            int(network.network_address),
+            int(network.broadcast_address),
+        )
+    if "-" in item:
+        left, right = (part.strip() for part in item.split("-", 1))
+        first = ipaddress.ip_address(left)
+        if first.version == 4 and right.isdigit():
+            # 10.0.0.1-50 only replaces the last octet
+            if int(right) > 255:
+                raise ValueError(f"Invalid IP range: {item}")
+            last = ipaddress.IPv4Address(int(first) & ~255 | int(right))
+        else:
+            last = ipaddress.ip_address(right)
+        if first.version != last.version or last < first:
+            raise ValueError(f"Invalid IP range: {item}")
+        return first.version, int(first), int(last)
+    address = ipaddress.ip_address(item)
+    return address.version, int(address), int(address)
+
+
+def _merge(pairs) -> list[tuple[int, int]]:
+    merged = []
+    for first, last in sorted(pairs):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def _subtract(
+    include: list[tuple[int, int]], exclude: list[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """Removes the merged exclude intervals from the merged include intervals."""
+    result = []
+    j = 0
+    for first, last in include:
+        while j < len(exclude) and exclude[j][1] < first:
+            j += 1
+        k = j
+        while k < len(exclude) and exclude[k][0] <= last:
+            if exclude[k][0] > first:
+                result.append((first, exclude[k][0] - 1))
+            first = max(first, exclude[k][1] + 1)
+            k += 1
+        if first <= last:
+            result.append((first, last))
+    return result
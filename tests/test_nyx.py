@@ -5,6 +5,24 @@ from unittest.mock import patch
 from src.nyx import Nyx
 
 
+def _square(x):
+    return x * x
+
+
+@pytest.fixture
+def isolated_types():
+    """Restores the global type registry and the validation cache settings after a test."""
+    from src.nyx import _TYPES
+
+    saved = dict(_TYPES)
+    try:
+        yield
+    finally:
+        _TYPES.clear()
+        _TYPES.update(saved)
+        Nyx.validation_cache()
+
+
 def test_nyx_initialization():
     nyx = Nyx()
     assert isinstance(nyx, Nyx)
@@ -323,3 +341,1055 @@ def test_valid_directory():
 
     nyx.parse_args()
     assert nyx.directory == "./src/"
+
+
+def test_run_yields_all_results():
+    nyx = Nyx()
+
+    results = nyx.run(lambda x: x * 2, range(100), workers=8)
+
+    assert sorted(results) == [x * 2 for x in range(100)]
+
+
+def test_run_bounds_pending_targets():
+    nyx = Nyx()
+    pulled = []
+
+    def targets():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    results = nyx.run(lambda x: x, targets(), workers=2, max_pending=4)
+    next(results)
+    results.close()
+
+    assert len(pulled) <= 4
+
+
+def test_run_propagates_errors():
+    nyx = Nyx()
+
+    def boom(x):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        list(nyx.run(boom, range(5)))
+
+
+def test_run_rejects_bad_arguments_at_call_time():
+    nyx = Nyx()
+
+    # no next() needed, the checks run before the generator does
+    with pytest.raises(ValueError, match="procss"):
+        nyx.run(str, range(5), mode="procss")
+    with pytest.raises(ValueError, match="workers"):
+        nyx.run(str, range(5), workers=0)
+
+
+def test_run_ordered_results():
+    import time
+
+    nyx = Nyx()
+
+    def slow_first(x):
+        if x == 0:
+            time.sleep(0.05)
+        return x
+
+    results = nyx.run(slow_first, range(20), workers=4, ordered=True)
+
+    assert list(results) == list(range(20))
+
+
+def test_run_process_mode():
+    nyx = Nyx()
+
+    results = nyx.run(_square, range(200), workers=2, mode="process", ordered=True)
+
+    assert list(results) == [x * x for x in range(200)]
+
+
+def test_run_process_mode_fixed_chunks():
+    nyx = Nyx()
+
+    results = nyx.run(_square, range(50), workers=2, mode="process", chunksize=7)
+
+    assert sorted(results) == [x * x for x in range(50)]
+
+
+def test_gather_bounded_limits_concurrency():
+    import asyncio
+
+    nyx = Nyx()
+    running = 0
+    peak = 0
+
+    async def probe(x):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return x * 2
+
+    results = asyncio.run(nyx.gather_bounded(probe, range(50), concurrency=5))
+
+    assert results == [x * 2 for x in range(50)]
+    assert peak <= 5
+
+
+def test_gather_bounded_logs_from_coroutines():
+    import asyncio
+
+    nyx = Nyx()
+
+    async def probe(x):
+        nyx.success(f"host {x} is up", color_text=False)
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        asyncio.run(nyx.gather_bounded(probe, range(3), collect=False))
+        output = mock_stdout.getvalue()
+
+    for x in range(3):
+        assert f"host {x} is up" in output
+
+
+def test_buffered_output_batches_writes():
+    nyx = Nyx()
+    stream = StringIO()
+    nyx.buffer_output(stream=stream, flush_lines=3, flush_interval=None)
+
+    nyx.info("first", color_text=False)
+    nyx.info("second", color_text=False)
+    assert stream.getvalue() == ""
+
+    nyx.info("third", color_text=False)
+    output = stream.getvalue()
+    assert "first" in output and "second" in output and "third" in output
+    assert output.count("\n") == 3
+
+
+def test_buffered_output_flushes_on_error():
+    nyx = Nyx()
+    stream = StringIO()
+    nyx.buffer_output(stream=stream, flush_lines=100, flush_interval=None)
+
+    nyx.warning("pending", color_text=False)
+    nyx.error("boom", color_text=False)
+
+    output = stream.getvalue()
+    assert output.index("pending") < output.index("boom")
+
+
+def test_buffered_output_flushes_quiet_buffer_after_interval():
+    import time
+
+    nyx = Nyx()
+    stream = StringIO()
+    nyx.buffer_output(stream=stream, flush_lines=100, flush_interval=0.05)
+
+    # one finding, then nothing else is logged
+    nyx.success("found", color_text=False)
+    assert stream.getvalue() == ""
+    deadline = time.monotonic() + 5
+    while not stream.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "found" in stream.getvalue()
+    nyx.buffer_output(False)
+
+
+def test_theme_changes_log_prefix():
+    nyx = Nyx()
+    nyx.config(theme="hack")
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.success("owned", color_text=False)
+        output = mock_stdout.getvalue()
+
+    assert "[\033[92m++\033[0;37m] \033[0;37mSUCCESS: owned" in output
+
+
+def test_log_level_filtering():
+    nyx = Nyx()
+    nyx.config(level="warning")
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.info("hidden info", color_text=False)
+        nyx.success("hidden success", color_text=False)
+        nyx.warning("shown warning", color_text=False)
+        output = mock_stdout.getvalue()
+
+    assert "hidden" not in output
+    assert "shown warning" in output
+
+
+def test_lazy_log_formatting():
+    nyx = Nyx()
+    nyx.disable_level("info")
+    calls = []
+
+    def message():
+        calls.append(1)
+        return "built"
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.info(message)
+        nyx.success("probe %s -> %d", "10.0.0.1", 200, color_text=False)
+        nyx.warning(message, color_text=False)
+        output = mock_stdout.getvalue()
+
+    assert calls == [1]
+    assert "probe 10.0.0.1 -> 200" in output
+    assert "built" in output
+
+
+def test_quiet_flag():
+    nyx = Nyx()
+    nyx.add_verbosity_args()
+    sys.argv = ["program.py", "-q"]
+    nyx.parse_args()
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.info("probe", color_text=False)
+        nyx.success("found", color_text=False)
+        output = mock_stdout.getvalue()
+
+    assert "probe" not in output
+    assert "found" in output
+
+
+def test_background_output_whole_lines():
+    import threading
+
+    nyx = Nyx()
+    stream = StringIO()
+    nyx.background_output(stream=stream)
+
+    def worker(n):
+        for i in range(200):
+            nyx.info(f"worker {n} line {i}", color_text=False)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    nyx.flush()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 800
+    assert all(line.endswith(tuple(f"line {i}" for i in range(200))) for line in lines)
+    nyx.background_output(enabled=False)
+
+
+def test_jsonl_output():
+    import json
+
+    nyx = Nyx()
+    nyx.config(output="jsonl")
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.success('port "open"', host="10.0.0.5", port=443, tls=True, tags=["web"])
+        nyx.error("timeout")
+        lines = mock_stdout.getvalue().splitlines()
+
+    first = json.loads(lines[0])
+    assert first["level"] == "success"
+    assert first["msg"] == 'port "open"'
+    assert first["host"] == "10.0.0.5"
+    assert first["port"] == 443
+    assert first["tls"] is True
+    assert first["tags"] == ["web"]
+    assert isinstance(first["ts"], float)
+    assert json.loads(lines[1])["level"] == "error"
+
+
+def test_jsonl_output_field_edge_cases():
+    import json
+    from enum import IntEnum
+
+    class Status(IntEnum):
+        OK = 200
+
+    nyx = Nyx()
+    nyx.config(output="jsonl")
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.success("x", status=Status.OK, level="admin", msg="hi", ts=1, port=443)
+        line = mock_stdout.getvalue().strip()
+
+    assert json.loads(line, object_pairs_hook=list) == [
+        ("level", "success"),
+        ("ts", json.loads(line)["ts"]),
+        ("msg", "x"),
+        ("status", 200),
+        ("field_level", "admin"),
+        ("field_msg", "hi"),
+        ("field_ts", 1),
+        ("port", 443),
+    ]
+
+
+def test_text_output_fields():
+    nyx = Nyx()
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.success("port open", color_text=False, host="10.0.0.5", port=443)
+        output = mock_stdout.getvalue()
+
+    assert "SUCCESS: port open host=10.0.0.5 port=443" in output
+
+
+def test_parse_args_token_forms():
+    nyx = Nyx()
+    nyx.add_arg(long="url", short="u", description="Target", arg_type="url")
+    nyx.add_arg(long="offset", short="o", description="Offset", arg_type="int")
+    nyx.add_arg(long="port", short="p", description="Port", arg_type="port")
+    nyx.add_arg(long="all", short="a", description="All", arg_type="flag")
+    nyx.add_arg(long="brief", short="b", description="Brief", arg_type="flag")
+
+    nyx.parse_args(
+        argv=["--url=https://example.com", "--offset", "-5", "-p80", "-ab", "x", "--", "-p", "1"]
+    )
+
+    assert nyx.url == "https://example.com"
+    assert nyx.offset == -5
+    assert nyx.port == 80
+    assert nyx.all is True
+    assert nyx.brief is True
+    assert nyx.get_positionals() == ["x", "-p", "1"]
+
+
+def test_parse_args_flag_does_not_take_value():
+    nyx = Nyx()
+    nyx.add_arg(long="verbose", short="v", description="Verbose", arg_type="flag")
+    nyx.add_arg(long="name", short="n", description="Name")
+
+    nyx.parse_args(argv=["-v", "target", "--name", "value"])
+
+    assert nyx.verbose is True
+    assert nyx.name == "value"
+    assert nyx.get_positionals() == ["target"]
+
+
+def test_flag_rejects_attached_value():
+    from src.nyx import ArgumentError
+
+    nyx = Nyx()
+    nyx.add_arg(long="all", short="a", description="All", arg_type="flag")
+    parser = nyx.compile()
+
+    with pytest.raises(ArgumentError) as excinfo:
+        parser.parse(["--all=false"])
+    assert excinfo.value.errors == ["'--all' doesn't take a value"]
+    assert parser.parse(["--all"]).all is True
+
+    nyx.add_arg(long="brief", short="b", description="Brief", arg_type="flag")
+    parser = nyx.compile()
+    for argv, error in (
+        (["-afalse"], "'-a' doesn't take a value"),
+        (["-ax"], "Unknown option '-x' in '-ax'"),
+        (["-abx"], "Unknown option '-x' in '-abx'"),
+    ):
+        with pytest.raises(ArgumentError) as excinfo:
+            parser.parse(argv)
+        assert excinfo.value.errors == [error]
+    assert parser.parse(["-ab"]).brief is True
+
+
+def test_compiled_parser_is_reusable():
+    from concurrent.futures import ThreadPoolExecutor
+
+    nyx = Nyx()
+    nyx.add_arg(long="port", short="p", description="Port", required=True, arg_type="port")
+    parser = nyx.compile()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda p: parser.parse(["-p", str(p)]), range(1, 500)))
+
+    assert [result.port for result in results] == list(range(1, 500))
+    assert nyx.port is None
+
+
+def test_compiled_parser_raises_instead_of_exiting():
+    from src.nyx import ArgumentError, HelpRequested
+
+    nyx = Nyx()
+    nyx.add_arg(long="port", short="p", description="Port", required=True, arg_type="port")
+    parser = nyx.compile()
+
+    with pytest.raises(ArgumentError):
+        parser.parse(["--port", "0"])
+    with pytest.raises(ArgumentError):
+        parser.parse([])
+    with pytest.raises(HelpRequested):
+        parser.parse(["-h"])
+
+
+def test_parse_args_slots_namespace():
+    nyx = Nyx()
+    nyx.add_arg(long="dry-run", short="d", description="Dry run", arg_type="flag")
+    nyx.add_arg(long="host", short="H", description="Host")
+
+    args = nyx.parse_args(argv=["--host", "10.0.0.1", "-d"], slots=True)
+
+    assert args.host == "10.0.0.1"
+    assert args.dry_run is True
+    assert getattr(args, "dry-run") is True
+    assert not hasattr(args, "__dict__")
+    assert args.as_dict() == {"dry-run": True, "host": "10.0.0.1"}
+    assert nyx.host == "10.0.0.1"
+
+
+def test_typed_conversion():
+    nyx = Nyx()
+    nyx.add_arg(long="number", short="n", description="Number", arg_type="int")
+    nyx.add_arg(long="ratio", short="r", description="Ratio", arg_type="float")
+    nyx.add_arg(long="port", short="p", description="Port", arg_type="port")
+
+    nyx.parse_args(argv=["-n", "2", "-r", "3.14", "-p", "443"])
+
+    assert nyx.number == 2
+    assert nyx.ratio == 3.14
+    assert nyx.port == 443
+
+
+def test_register_custom_type(isolated_types):
+    def duration(value):
+        units = {"s": 1, "m": 60, "h": 3600}
+        return int(value[:-1]) * units[value[-1]]
+
+    Nyx.register_type("duration", duration, "a duration (e.g., 30s, 5m)", value_type=int)
+    nyx = Nyx()
+    nyx.add_arg(long="timeout", short="t", description="Timeout", arg_type="duration")
+
+    nyx.parse_args(argv=["--timeout", "5m"])
+    assert nyx.timeout == 300
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        nyx.get_types()
+        output = mock_stdout.getvalue()
+    assert "duration -> a duration (e.g., 30s, 5m)" in output
+
+    sys.argv = ["program.py", "--timeout", "5x"]
+    with pytest.raises(SystemExit):
+        nyx.parse_args()
+
+
+def test_lines_type(tmp_path):
+    path = tmp_path / "targets.txt"
+    path.write_text("10.0.0.1\nnot-an-ip\r\n10.0.0.2\n\n10.0.0.3")
+
+    nyx = Nyx()
+    nyx.add_arg(long="raw", short="r", description="Raw lines", arg_type="lines")
+    nyx.add_arg(long="targets", short="t", description="Targets", arg_type="lines:ip")
+    nyx.parse_args(argv=["-r", str(path), "-t", str(path)])
+
+    assert len(nyx.raw) == 5
+    assert list(nyx.raw) == ["10.0.0.1", "not-an-ip", "10.0.0.2", "", "10.0.0.3"]
+    assert nyx.raw[1] == "not-an-ip"
+    assert nyx.raw[-1] == "10.0.0.3"
+    assert list(nyx.targets) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert nyx.targets.skipped == 2
+
+
+def test_lines_shards(tmp_path):
+    from src.lines import LineFile
+
+    path = tmp_path / "words.txt"
+    words = [f"word{i}" for i in range(1000)]
+    path.write_text("\n".join(words) + "\n")
+
+    lines = LineFile(str(path))
+    shards = lines.shards(7)
+
+    assert [word for shard in shards for word in shard] == words
+    assert sum(len(shard) for shard in shards) == len(lines) == 1000
+    assert lines[567] == "word567"
+
+
+def test_cidr_type():
+    nyx = Nyx()
+    nyx.add_arg(long="scope", short="s", description="Scope", arg_type="cidr")
+
+    nyx.parse_args(argv=["--scope", "10.0.0.0/24,!10.0.0.128/25,10.0.1.200-210,fd00::/126"])
+
+    assert len(nyx.scope) == 128 + 11 + 4
+    assert "10.0.0.5" in nyx.scope
+    assert "10.0.0.150" not in nyx.scope
+    assert "10.0.1.205" in nyx.scope
+    assert "fd00::2" in nyx.scope
+    addresses = list(nyx.scope)
+    assert addresses[0] == "10.0.0.0"
+    assert addresses[-1] == "fd00::3"
+    assert [ip for shard in nyx.scope.shards(5) for ip in shard] == addresses
+
+
+def test_iprange_alias():
+    from src.nyx import _TYPES, ArgumentError
+
+    nyx = Nyx()
+    nyx.add_arg(long="scope", short="s", description="Scope", arg_type="iprange")
+
+    result = nyx.compile().parse(["--scope", "10.0.0.0/30"])
+
+    assert type(result.scope).__name__ == "IPRangeSet"
+    assert list(result.scope) == ["10.0.0.0", "10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert _TYPES["iprange"] is _TYPES["cidr"]
+    with pytest.raises(ArgumentError):
+        nyx.compile().parse(["--scope", "10.0.0.0/33"])
+
+
+def test_invalid_cidr():
+    nyx = Nyx()
+    nyx.add_arg(long="scope", short="s", description="Scope", arg_type="cidr")
+    sys.argv = ["program.py", "--scope", "10.0.0.0/33"]
+
+    with pytest.raises(SystemExit):
+        nyx.parse_args()
+
+
+def test_ports_type():
+    nyx = Nyx()
+    nyx.add_arg(long="ports", short="p", description="Ports", arg_type="ports")
+
+    nyx.parse_args(argv=["-p", "1-1024,3306,8000-8010,!22,!80"])
+
+    assert len(nyx.ports) == 1024 - 2 + 1 + 11
+    assert 22 not in nyx.ports
+    assert 3306 in nyx.ports
+    assert 65535 not in nyx.ports
+    ports = list(nyx.ports)
+    assert ports[:3] == [1, 2, 3]
+    assert ports[-1] == 8010
+    assert [port for chunk in nyx.ports.chunks(3) for port in chunk] == ports
+
+
+def test_ports_named_sets():
+    from src.ports import PortSet
+
+    assert len(PortSet.parse("top100")) == 100
+    assert len(PortSet.parse("all")) == 65535
+    assert 8080 in PortSet.parse("top20")
+
+
+def test_invalid_ports():
+    nyx = Nyx()
+    nyx.add_arg(long="ports", short="p", description="Ports", arg_type="ports")
+    sys.argv = ["program.py", "-p", "1-70000"]
+
+    with pytest.raises(SystemExit):
+        nyx.parse_args()
+
+
+def test_dispatch_batch_mode(tmp_path):
+    jobs = tmp_path / "jobs.txt"
+    jobs.write_text("# comment\n--port 80\n\n--port 0\n--port 443 --fail\n--port 8080\n")
+
+    nyx = Nyx()
+    nyx.add_arg(long="port", short="p", description="Port", required=True, arg_type="port")
+    nyx.add_arg(long="fail", short="f", description="Fail", arg_type="flag")
+    nyx.add_arg(long="host", short="H", description="Host")
+    seen = []
+
+    def main(args):
+        seen.append((args.host, args.port))
+        nyx.info(f"scanning {args.port}", color_text=False)
+        return 1 if args.fail else 0
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        status = nyx.dispatch(main, argv=["--nyx-batch", str(jobs), "-H", "box"], workers=2)
+        output = mock_stdout.getvalue()
+
+    assert status == 1
+    assert sorted(seen) == [("box", 80), ("box", 443), ("box", 8080)]
+    assert "[job 2] scanning 80" in output
+    assert "ERROR: [job 4] Invalid port for 'port': 0" in output
+    assert "2 of 4 batch jobs failed" in output
+
+
+def test_dispatch_single_run():
+    nyx = Nyx()
+    nyx.add_arg(long="port", short="p", description="Port", arg_type="port")
+
+    assert nyx.dispatch(lambda args: args.port - 80, argv=["-p", "80"]) == 0
+
+
+def test_validation_cache(isolated_types):
+    Nyx.validation_cache(maxsize=2)
+    calls = []
+
+    def hostname(value):
+        calls.append(value)
+        return value.lower()
+
+    Nyx.register_type("hostname", hostname, cache=True)
+    parser = Nyx()
+    parser.add_arg(long="host", short="H", description="Host", arg_type="hostname")
+    compiled = parser.compile()
+
+    for _ in range(3):
+        assert compiled.parse(["-H", "Box"]).host == "box"
+    assert calls == ["Box"]
+    assert Nyx.validation_cache_info() == {"hits": 2, "misses": 1, "size": 1, "maxsize": 2}
+
+    compiled.parse(["-H", "a"])
+    compiled.parse(["-H", "b"])
+    compiled.parse(["-H", "Box"])
+    assert calls == ["Box", "a", "b", "Box"]
+    assert Nyx.validation_cache_info()["size"] == 2
+
+
+def test_validation_cache_ttl(tmp_path, isolated_types):
+    from src.nyx import ArgumentError
+
+    Nyx.validation_cache(ttl=60)
+    path = tmp_path / "evidence.txt"
+    path.write_text("x")
+    parser = Nyx()
+    parser.add_arg(long="input", short="i", description="Input", arg_type="file")
+    compiled = parser.compile()
+
+    compiled.parse(["-i", str(path)])
+    path.unlink()
+    # still cached, the file check isn't repeated within the ttl
+    assert compiled.parse(["-i", str(path)]).input == str(path)
+
+    Nyx.validation_cache(ttl=0)
+    with pytest.raises(ArgumentError):
+        compiled.parse(["-i", str(path)])
+    assert Nyx.validation_cache_info()["size"] == 0
+
+
+def test_all_argument_errors_reported():
+    from src.nyx import ArgumentError
+
+    parser = Nyx()
+    parser.add_arg(long="input", short="i", description="Input", arg_type="file")
+    parser.add_arg(long="port", short="p", description="Port", arg_type="port")
+    parser.add_arg(long="target", short="t", description="Target", required=True)
+
+    with pytest.raises(ArgumentError) as excinfo:
+        parser.compile().parse(["-i", "/no/such/file", "-p", "0"])
+    assert excinfo.value.errors == [
+        "File does not exist or cannot be read: /no/such/file",
+        "Invalid port for 'port': 0",
+        "The following required arguments are missing: target",
+    ]
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        with pytest.raises(SystemExit):
+            parser.parse_args(argv=["-i", "/no/such/file", "-p", "0", "-t", "x"])
+        output = mock_stdout.getvalue()
+    assert "Error: File does not exist or cannot be read: /no/such/file" in output
+    assert "Error: Invalid port for 'port': 0" in output
+
+
+def test_blocking_types_validated_concurrently(isolated_types):
+    import threading
+
+    seen = []
+    both_started = threading.Barrier(2, timeout=5)
+
+    def remote(value):
+        seen.append(threading.current_thread().name)
+        # only passes if the other check runs at the same time
+        both_started.wait()
+        return value
+
+    Nyx.register_type("remote", remote, blocking=True)
+    parser = Nyx()
+    parser.add_arg(long="first", short="f", description="First", arg_type="remote")
+    parser.add_arg(long="second", short="s", description="Second", arg_type="remote")
+
+    result = parser.compile().parse(["-f", "a", "-s", "b"])
+    assert (result.first, result.second) == ("a", "b")
+    assert all(name.startswith("nyx-validate") for name in seen)
+
+
+def test_run_metrics():
+    nyx = Nyx()
+    assert nyx.stats() == {}
+    nyx.enable_metrics()
+
+    assert sorted(nyx.run(_square, range(50), workers=4)) == [x * x for x in range(50)]
+    with pytest.raises(ZeroDivisionError):
+        list(nyx.run(lambda x: 1 // x, [0], workers=1))
+
+    stats = nyx.stats()
+    assert (stats["submitted"], stats["completed"], stats["failed"]) == (51, 50, 1)
+    assert stats["in_flight"] == 0
+    assert sum(stats["latency"]["buckets"].values()) == 51
+    assert 0 <= stats["latency"]["p50"] <= stats["latency"]["max"]
+    assert set(stats["rate"]) == {"1s", "10s", "60s", "avg"}
+
+
+def test_metrics_dump_on_signal(tmp_path):
+    import json
+    import os
+    import signal
+
+    dump = tmp_path / "stats.json"
+    nyx = Nyx()
+    nyx.enable_metrics(dump=str(dump), on_signal=True)
+    try:
+        with patch("sys.stdout", new_callable=StringIO):
+            nyx.info("hello")
+        os.kill(os.getpid(), signal.SIGUSR1)
+        stats = json.loads(dump.read_text())
+    finally:
+        signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+        nyx.enable_metrics(False)
+
+    assert stats["log"]["lines"] == 1
+    assert stats["submitted"] == 0
+
+
+class _Terminal(StringIO):
+    def isatty(self):
+        return True
+
+
+def test_run_progress_line():
+    nyx = Nyx()
+
+    def probe(x):
+        if x == 3:
+            nyx.info("found 3", color_text=False)
+        return x
+
+    with patch("sys.stderr", new_callable=_Terminal) as mock_stderr:
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            results = list(nyx.run(probe, range(10), workers=2, progress=True))
+        status = mock_stderr.getvalue()
+
+    assert sorted(results) == list(range(10))
+    assert "found 3" in mock_stdout.getvalue()
+    assert status.startswith("\r\033[K10/10 (100.0%) | ")
+    assert status.endswith("/s\n")
+
+
+def test_progress_line_redraw_is_throttled_with_logging():
+    import time
+    from src.nyx import _Progress
+
+    stream = _Terminal()
+    status = _Progress(100_000, stream=stream, hz=10)
+    time.sleep(0.11)
+    status.advance()
+    assert stream.getvalue().count("\r\033[K") == 1
+
+    # a log line per item: the line is cleared once and not redrawn until the next tick
+    for _ in range(1000):
+        status.pause()
+        status.resume()
+        status.advance()
+    assert stream.getvalue().count("\r\033[K") == 2
+
+    # a log line with no item finishing after it still brings the line back once it's due
+    time.sleep(0.11)
+    status.pause()
+    status.resume()
+    redraws = stream.getvalue().split("\r\033[K")
+    assert len(redraws) == 4
+    assert redraws[-1].startswith("1,001/100,000 (1.0%) | ")
+
+
+def test_run_progress_with_huge_range():
+    from itertools import islice
+    from src.ranges import IPRangeSet
+
+    nyx = Nyx()
+    scope = IPRangeSet.parse("fd00::/64")
+    with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+        results = nyx.run(str, scope, workers=2, ordered=True, progress=True)
+        assert list(islice(results, 3)) == ["fd00::", "fd00::1", "fd00::2"]
+        results.close()
+
+    assert "/18,446,744,073,709,551,616 (0.0%)" in mock_stderr.getvalue()
+
+
+def test_run_progress_summary_without_terminal():
+    nyx = Nyx()
+    with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+        assert len(list(nyx.run(_square, iter(range(5)), progress=True, total=5))) == 5
+        status = mock_stderr.getvalue()
+
+    assert status.startswith("[progress] 5/5 (100.0%) | ")
+    assert "\r" not in status
+
+
+def test_reserved_flags_are_split_off():
+    from src.nyx import _split_reserved
+
+    argv = ["-u", "x", "--nyx-profile", "--nyx-memprofile=mem.txt", "--nyx-batch", "jobs.txt"]
+    assert _split_reserved(argv + ["--nyx-resume"]) == (
+        ["-u", "x"],
+        {"profile": "", "memprofile": "mem.txt", "batch": "jobs.txt", "resume": ""},
+    )
+    assert _split_reserved(["--", "--nyx-profile"]) == (["--", "--nyx-profile"], {})
+
+
+def test_profile_flag(tmp_path):
+    import os
+    import pstats
+    import subprocess
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    profile = tmp_path / "out.pstats"
+    code = (
+        "from nyx import Nyx\n"
+        "nyx = Nyx()\n"
+        "nyx.add_arg(long='count', short='c', description='Count', arg_type='int')\n"
+        "args = nyx.parse_args()\n"
+        "print(sum(nyx.run(abs, range(args.count))))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, "-c", "5", f"--nyx-profile={profile}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout == "10\n"
+    assert "nyx phases (wall time): parse" in result.stderr
+    assert "runner" in result.stderr
+    assert pstats.Stats(str(profile)).total_calls > 0
+
+
+def _newest_python():
+    import shutil
+    import subprocess
+
+    # newest python3.N on PATH that actually starts (pyenv shims exist for every version)
+    for minor in range(20, sys.version_info.minor, -1):
+        path = shutil.which(f"python3.{minor}")
+        if path and subprocess.run([path, "-c", ""], capture_output=True).returncode == 0:
+            return path
+    return sys.executable
+
+
+@pytest.mark.parametrize("python", [sys.executable, _newest_python()])
+def test_profile_flag_with_thread_workers(tmp_path, python):
+    import os
+    import subprocess
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    report = tmp_path / "out.txt"
+    code = (
+        "from nyx import Nyx\n"
+        "def work(n):\n"
+        "    return sum(range(n))\n"
+        "nyx = Nyx()\n"
+        "nyx.parse_args()\n"
+        "print(len(list(nyx.run(work, [200_000] * 50, workers=4))))\n"
+    )
+    result = subprocess.run(
+        [python, "-c", code, f"--nyx-profile={report}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+
+    assert result.stdout == "50\n"
+    assert "Traceback" not in result.stderr
+    # the workers' calls are in the report, whichever way cProfile saw their threads
+    assert "(work)" in report.read_text()
+
+
+def test_suppress_repeats():
+    import atexit
+
+    nyx = Nyx()
+    nyx.suppress_repeats(window=60)
+    atexit.unregister(nyx._Nyx__flood_at_exit)
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        for _ in range(1000):
+            nyx.warning("connection reset", color_text=False, host="a")
+        nyx.warning("connection reset", color_text=False, host="b")
+        nyx.flush()
+        lines = mock_stdout.getvalue().splitlines()
+
+    assert len(lines) == 3
+    assert lines[0].endswith("connection reset host=a")
+    assert lines[1].endswith("connection reset host=b")
+    assert lines[2].endswith("connection reset host=a (repeated 999 times)")
+
+
+def test_rate_limit():
+    import atexit
+
+    nyx = Nyx()
+    nyx.rate_limit("error", per_second=0.001, burst=3)
+    # the drop report is checked below, it shouldn't also end up after pytest's summary
+    atexit.unregister(nyx._Nyx__flood_at_exit)
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        for i in range(100):
+            nyx.error(f"timeout {i}", color_text=False)
+        nyx.info("still shown", color_text=False)
+        lines = mock_stdout.getvalue().splitlines()
+
+    assert len(lines) == 4
+    assert lines[2].endswith("timeout 2")
+    assert nyx._Nyx__flood.dropped() == {"error": 97}
+
+    with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+        nyx._Nyx__flood_at_exit()
+    assert mock_stderr.getvalue() == "nyx: rate limits dropped 97 error lines\n"
+
+
+def test_record_findings(tmp_path):
+    import csv
+    import json
+
+    nyx = Nyx()
+    nyx.findings_store(key=("host", "port"), memory_limit=2000)
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        for i in range(200):
+            assert nyx.record(host=f"10.0.{i // 50}.{i % 50}", port=443, service="https")
+        assert not nyx.record("port open", host="10.0.0.1", port=443, service="other")
+        assert nyx.record("port open", host="10.0.0.1", port=22, banner="OpenSSH")
+        output = mock_stdout.getvalue()
+
+    assert output.count("port open") == 1
+    assert "host=10.0.0.1 port=22 banner=OpenSSH" in output
+
+    assert nyx.export_findings(str(tmp_path / "out.csv")) == 201
+    with open(tmp_path / "out.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0] == {"host": "10.0.0.0", "port": "443", "service": "https", "banner": ""}
+    assert rows[-1] == {"host": "10.0.0.1", "port": "22", "service": "", "banner": "OpenSSH"}
+
+    nyx.export_findings(str(tmp_path / "out.jsonl"))
+    lines = (tmp_path / "out.jsonl").read_text().splitlines()
+    assert len(lines) == 201
+    assert json.loads(lines[-1]) == {"host": "10.0.0.1", "port": 22, "banner": "OpenSSH"}
+
+
+def test_record_fields_named_like_log_parameters():
+    nyx = Nyx()
+
+    with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+        assert nyx.record("open", log="x", host="h", color_text=False)
+        nyx.success("fields", log="y")
+        output = mock_stdout.getvalue()
+
+    assert "open log=x host=h color_text=False" in output
+    assert "fields log=y" in output
+    assert list(nyx._Nyx__findings) == [{"log": "x", "host": "h", "color_text": False}]
+
+
+def test_findings_exact_dedupe_keeps_types_apart():
+    from src.findings import FindingsStore
+
+    store = FindingsStore()
+    # builtin hash() collides on all of these
+    assert store.add({"port": -1}) and store.add({"port": -2})
+    assert store.add({"open": True}) and store.add({"open": 1}) and store.add({"open": 1.0})
+    assert store.add({"port": "1"})
+    assert not store.add({"port": -2})
+
+    keyed = FindingsStore(key=("host", "port"))
+    assert keyed.add({"host": "a", "port": 1, "x": 1})
+    assert not keyed.add({"port": 1, "x": 2, "host": "a"})
+    assert keyed.add({"host": "a", "port": True})
+    assert len(store) == 6 and store.duplicates == 1
+
+
+def test_findings_exact_dedupe_spills_digests():
+    from src.findings import FindingsStore
+
+    store = FindingsStore(memory_limit=2000)
+    assert all(store.add({"host": f"h{i}", "port": 443}) for i in range(500))
+    # the digests went to disk with the rows (and the on-disk runs were merged)
+    assert len(store._FindingsStore__seen._DigestSet__recent) < 50
+    assert len(store._FindingsStore__seen._DigestSet__runs) <= 8
+
+    assert not any(store.add({"host": f"h{i}", "port": 443}) for i in range(500))
+    assert store.add({"host": "h1", "port": 80})
+    assert store.duplicates == 500
+    assert len(store) == 501
+    store.close()
+
+
+def test_findings_approximate_dedupe():
+    from src.findings import FindingsStore
+
+    store = FindingsStore(dedupe="approx", capacity=10_000, error_rate=0.001)
+    added = sum(store.add({"host": f"h{i}"}) for i in range(5000))
+    repeated = sum(store.add({"host": f"h{i}"}) for i in range(5000))
+
+    assert added >= 4990
+    assert repeated == 0
+    assert store.duplicates == 10_000 - added
+    assert len(store) == added
+
+
+def test_run_checkpoint_resume(tmp_path):
+    path = str(tmp_path / "run.checkpoint")
+    nyx = Nyx()
+
+    results = nyx.run(_square, range(100), workers=4, ordered=True, checkpoint=path)
+    first = [next(results) for _ in range(30)]
+    results.close()
+    assert first == [x * x for x in range(30)]
+
+    # the 30th result was handed out but the loop never came back for the next one
+    nyx.parse_args(argv=["--nyx-resume"])
+    rest = list(nyx.run(_square, range(100), workers=4, checkpoint=path))
+    assert sorted(rest) == [x * x for x in range(29, 100)]
+
+    # everything is done now, and without --nyx-resume the checkpoint starts over
+    assert list(nyx.run(_square, range(100), checkpoint=path)) == []
+    assert len(list(nyx.run(_square, range(100), checkpoint=path, resume=False))) == 100
+
+
+def test_run_checkpoint_keys_process_mode(tmp_path):
+    from src.checkpoint import Checkpoint
+
+    path = str(tmp_path / "hosts.checkpoint")
+    with Checkpoint(path) as done:
+        for host in ("a", "c"):
+            done.add(f"{host}.example")
+    with open(path, "a") as f:
+        f.write("12345")  # half-written line of a killed run
+
+    nyx = Nyx()
+    results = nyx.run(
+        len,
+        ["a", "b", "c", "dd"],
+        mode="process",
+        workers=2,
+        checkpoint=path,
+        key=lambda host: f"{host}.example",
+        resume=True,
+    )
+    assert sorted(results) == [1, 2]
+    with Checkpoint(path, resume=True) as done:
+        assert done.resumed == 4
+        assert all(done.done(f"{host}.example") for host in ("a", "b", "c", "dd"))
+
+
+def test_checkpoint_positions_use_a_bitmap(tmp_path):
+    from src.checkpoint import Checkpoint
+
+    path = str(tmp_path / "lines.checkpoint")
+    with Checkpoint(path, sync_every=50_000) as done:
+        for position in range(0, 200_000, 2):
+            done.add(position)
+        done.add("5")
+        done.add(-1)
+
+    with Checkpoint(path, resume=True) as done:
+        assert done.resumed == 100_002
+        # one bit per position, not a Python int per key
+        assert len(done._Checkpoint__positions) <= 2 * 200_000 // 8
+        assert done.done(199_998) and not done.done(199_999) and not done.done(10**9)
+        assert done.done("5") and not done.done(5) and done.done(-1)
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cumulative -X importtime of nyx.nyx in microseconds, best of a few runs
+IMPORT_BUDGET_US = 25_000
+
+# only validators/runners that need these may import them
+DEFERRED = (
+    "re",
+    "socket",
+    "json",
+    "threading",
+    "asyncio",
+    "concurrent.futures",
+    "shlex",
+    "queue",
+    "mmap",
+    "ipaddress",
+    "nyx.checkpoint",
+    "nyx.findings",
+    "nyx.lines",
+    "nyx.metrics",
+    "nyx.ports",
+    "nyx.profiling",
+    "nyx.ranges",
+)
+
+
+def _python(*args):
+    env = dict(os.environ)
+    # timings without cached bytecode would measure the compiler, not the import
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_time(module):
+    for line in _python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise AssertionError(f"{module} missing from -X importtime output")
+
+
+def test_import_skips_deferred_modules():
+    code = (
+        "import sys\n"
+        "before = set(sys.modules)\n"
+        "import nyx.nyx\n"
+        f"print(' '.join(m for m in {DEFERRED!r} if m in sys.modules and m not in before))"
+    )
+    assert _python("-c", code).stdout.split() == []
+
+
+def test_import_time_budget():
+    _python("-c", "import nyx.nyx")  # writes the bytecode cache
+    best = min(_import_time("nyx.nyx") for _ in range(3))
+    assert best < IMPORT_BUDGET_US, f"import nyx.nyx took {best} us"
+
+
+def test_lazy_package_exports():
+    code = (
+        "import sys, nyx\n"
+        "assert 'nyx.nyx' not in sys.modules\n"
+        "from nyx import PortSet\n"
+        "assert 'nyx.nyx' not in sys.modules\n"
+        "from nyx import Nyx\n"
+        "print(Nyx.__module__, PortSet.__module__)"
+    )
+    assert _python("-c", code).stdout.split() == ["nyx.nyx", "nyx.ports"]